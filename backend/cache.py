@@ -0,0 +1,66 @@
+"""
+Cache for serialized API responses.
+
+Entries are kept in-process and, when REDIS_URL is set, also in Redis so
+they are shared by every API process and survive restarts. The local tier
+answers repeat lookups without a network round trip.
+"""
+from typing import Optional
+import hashlib
+import logging
+import threading
+
+from cachetools import TTLCache
+
+from config import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """Byte-string cache with a fixed TTL: a local TTLCache in front of optional Redis"""
+    
+    def __init__(self, namespace: str, ttl: int, maxsize: int = 1024):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._redis = None
+        
+        if REDIS_URL:
+            # Optional dependency (pip install redis)
+            import redis
+            self._redis = redis.Redis.from_url(REDIS_URL)
+    
+    def key(self, *parts) -> str:
+        """Build a compact key from the request parameters"""
+        digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+        return f"mm:{self.namespace}:{digest}"
+    
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._local.get(key)
+        if value is not None or self._redis is None:
+            return value
+        
+        try:
+            value = self._redis.get(key)
+        except Exception as e:
+            # An unreachable cache is a miss, not a failed request
+            logger.warning("Response cache read failed: %s", e)
+            return None
+        
+        if value is not None:
+            with self._lock:
+                self._local[key] = value
+        return value
+    
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._local[key] = value
+        if self._redis is None:
+            return
+        
+        try:
+            self._redis.set(key, value, ex=self.ttl)
+        except Exception as e:
+            logger.warning("Response cache write failed: %s", e)
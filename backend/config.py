@@ -1,11 +1,65 @@
 import os
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional, Set
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # Base directories
 BASE_DIR = Path(__file__).parent.parent
 
+class Settings(BaseSettings):
+    """Application settings, read once from the environment and .env files"""
+    model_config = SettingsConfigDict(
+        # Later files take priority: backend/.env overrides the project .env
+        env_file=(BASE_DIR / ".env", Path(__file__).parent / ".env"),
+        env_ignore_empty=True,
+        extra="ignore"
+    )
+    
+    # External media directory (configurable)
+    external_media_dir: Optional[str] = None
+    
+    # Spotify API Configuration
+    spotify_client_id: Optional[str] = None
+    spotify_client_secret: Optional[str] = None
+    spotify_redirect_uri: str = "http://localhost:8000/auth/spotify/callback"
+    
+    # Database Configuration
+    database_url: str = "sqlite:///./mediamaestro.db"
+    
+    # Application Configuration
+    debug: bool = False
+    log_level: str = "info"
+    
+    # Worker threads for blocking route handlers (Spotify / yt-dlp calls)
+    threadpool_size: int = 100
+    
+    # Concurrent in-process downloads: the starting point and the ceiling the
+    # pool may tune up to from measured throughput
+    dl_concurrency: int = 4
+    dl_max_concurrency: int = 16
+    
+    # Optional Redis for the search response cache (in-process when unset)
+    redis_url: Optional[str] = None
+    search_cache_ttl: int = 600
+    
+    # Optional Celery broker for download jobs (e.g. redis://localhost:6379/0);
+    # downloads run in the API process when unset
+    celery_broker_url: Optional[str] = None
+    celery_result_backend: Optional[str] = None
+    
+    # Request profiling (requires pyinstrument; add ?profile=1 to a request)
+    profiling: bool = False
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
+
+settings = get_settings()
+
 # External media directory (configurable)
-EXTERNAL_MEDIA_DIR = os.getenv("EXTERNAL_MEDIA_DIR")
+EXTERNAL_MEDIA_DIR = settings.external_media_dir
 if EXTERNAL_MEDIA_DIR:
     MEDIA_DIR = Path(EXTERNAL_MEDIA_DIR)
 else:
@@ -22,26 +76,59 @@ PLAYLISTS = {
     "custom": "Custom"
 }
 
-# File extensions
-AUDIO_EXTENSIONS = [".mp3", ".flac", ".wav", ".m4a", ".aac"]
-VIDEO_EXTENSIONS = [".mp4", ".mkv", ".avi", ".webm"]
+# File extensions (frozensets - these are checked once per scanned file)
+AUDIO_EXTENSIONS = frozenset({".mp3", ".flac", ".wav", ".m4a", ".aac"})
+VIDEO_EXTENSIONS = frozenset({".mp4", ".mkv", ".avi", ".webm", ".mov"})
+MEDIA_EXTENSIONS = AUDIO_EXTENSIONS | VIDEO_EXTENSIONS
 
 # Spotify API Configuration
-SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
-SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
-SPOTIFY_REDIRECT_URI = os.getenv("SPOTIFY_REDIRECT_URI", "http://localhost:8000/auth/spotify/callback")
+SPOTIFY_CLIENT_ID = settings.spotify_client_id
+SPOTIFY_CLIENT_SECRET = settings.spotify_client_secret
+SPOTIFY_REDIRECT_URI = settings.spotify_redirect_uri
 
 # Database Configuration
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./mediamaestro.db")
+DATABASE_URL = settings.database_url
 
 # Application Configuration
-DEBUG = os.getenv("DEBUG", "false").lower() == "true"
-LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+DEBUG = settings.debug
+LOG_LEVEL = settings.log_level
+THREADPOOL_SIZE = settings.threadpool_size
+PROFILING = settings.profiling
+DL_CONCURRENCY = settings.dl_concurrency
+DL_MAX_CONCURRENCY = settings.dl_max_concurrency
+REDIS_URL = settings.redis_url
+SEARCH_CACHE_TTL = settings.search_cache_ttl
+CELERY_BROKER_URL = settings.celery_broker_url
+CELERY_RESULT_BACKEND = settings.celery_result_backend
+
+# Directory creation is deferred to first use so importing config never
+# touches the filesystem; paths already ensured in this process are skipped
+_ENSURED: Set[str] = set()
 
-# Create directories
-print(f"Creating media directories in: {MEDIA_DIR}")
-for playlist in PLAYLISTS.keys():
-    for media_type in ["mp3", "flac", "video"]:
-        (MEDIA_DIR / playlist / media_type).mkdir(parents=True, exist_ok=True)
+def ensure_dir(path: Path) -> Path:
+    """Create a directory (and parents) once per process"""
+    key = str(path)
+    if key not in _ENSURED:
+        _ENSURED.add(key)
+        if not path.is_dir():
+            os.makedirs(path, exist_ok=True)
+    return path
 
-DOWNLOADS_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+def ensure_media_dirs():
+    """Create the playlist/format folder layout under MEDIA_DIR"""
+    if str(MEDIA_DIR) in _ENSURED:
+        return
+    
+    print(f"Creating media directories in: {MEDIA_DIR}")
+    # Only the leaf folders are checked; makedirs creates a missing parent on
+    # the way, so MEDIA_DIR and the playlist folders are not stat'ed per leaf
+    leaves = sorted({
+        MEDIA_DIR / playlist / media_type
+        for playlist in PLAYLISTS.keys()
+        for media_type in ["mp3", "flac", "video"]
+    })
+    for leaf in leaves:
+        ensure_dir(leaf)
+    
+    _ENSURED.add(str(MEDIA_DIR))
+    ensure_dir(DOWNLOADS_DIR)
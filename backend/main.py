@@ -1,18 +1,43 @@
-from dotenv import load_dotenv
-import os
-
-load_dotenv()  # This line loads the environment variables from the .env file
-
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session, load_only
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from itertools import chain
+from logging.handlers import QueueHandler, QueueListener
+from cachetools import TTLCache
+import atexit
+import hashlib
 import logging
+import anyio
+import orjson
+import queue
+import threading
+import time
+
+from cache import ResponseCache
+from config import LOG_LEVEL, PROFILING, SEARCH_CACHE_TTL, THREADPOOL_SIZE
+from utils.spotify_errors import (
+    SpotifyAuthRequired,
+    SpotifyError,
+    SpotifyNotConfigured,
+    SpotifyRateLimited,
+    SpotifyUnavailable,
+)
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# Set up logging - records go onto a queue and a listener thread writes
+# them to stderr, so request threads never block on the stream write
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+logging.basicConfig(level=LOG_LEVEL.upper(), handlers=[QueueHandler(_log_queue)])
 logger = logging.getLogger(__name__)
 
 # Pydantic models for request bodies
@@ -29,20 +54,54 @@ class MatchPlaylistRequest(BaseModel):
     playlist_key: str
     spotify_playlist_id: Optional[str] = None
 
+class DownloadBatchRequest(BaseModel):
+    # An empty executemany list would fall back to one default-valued INSERT
+    urls: List[str] = Field(min_length=1)
+    format_type: str = "mp3"  # mp3, flac, video
+    playlist_id: Optional[int] = None
+
+class SpotifySearchQuery(BaseModel):
+    q: str
+    artist: Optional[str] = None
+
+class SpotifyBulkSearchRequest(BaseModel):
+    queries: List[SpotifySearchQuery]
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib json module"""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
 # Import our modules (we'll handle imports gracefully)
 try:
     from models.database import get_db, init_db, Playlist, Song, DownloadJob
-    from utils.spotify_manager import SpotifyManager
-    from utils.youtube_downloader import YouTubeDownloader
-    from utils.file_manager import FileManager
+    from tasks import enqueue_download, get_downloader
 except ImportError as e:
-    logging.warning(f"Some modules not available: {e}")
+    logging.warning("Some modules not available: %s", e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Routes that call the blocking Spotify / yt-dlp SDKs or the synchronous
+    # database session are plain `def` handlers run on AnyIO worker threads;
+    # raise the default cap of 40
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    yield
+    
+    if get_spotify_manager.cache_info().currsize:
+        spotify_manager = get_spotify_manager()
+        if spotify_manager:
+            spotify_manager.close()
+    
+    if get_downloader.cache_info().currsize:
+        get_downloader().close()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="MediaMaestro API",
     description="Media management system with Spotify integration and YouTube downloader",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -54,35 +113,224 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize managers
-try:
-    spotify_manager = SpotifyManager()
-    logger.info(f"Spotify manager initialized - configured: {spotify_manager.configured}")
-except Exception as e:
-    logger.error(f"Failed to initialize Spotify manager: {e}")
-    spotify_manager = None
+# Opt-in request profiling - with PROFILING enabled, append ?profile=1 to any
+# request to get a pyinstrument report instead of the normal response
+if PROFILING:
+    from fastapi.responses import HTMLResponse
+    from pyinstrument import Profiler
+
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        if not request.query_params.get("profile"):
+            return await call_next(request)
+
+        profiler = Profiler(interval=0.001, async_mode="enabled")
+        profiler.start()
+        response = await call_next(request)
+        # Drain the body too, so streamed serialization and database reads
+        # are part of the profile rather than just the handler
+        async for _ in response.body_iterator:
+            pass
+        profiler.stop()
+        return HTMLResponse(profiler.output_html())
+
+def _json_array_chunks(rows, head: bytes = b"", tail: bytes = b"", chunk_size: int = 100):
+    """Serialize rows as a JSON array, chunk_size rows at a time"""
+    buffer = [head + b"["]
+    for i, row in enumerate(rows):
+        buffer.append(orjson.dumps(row) if i == 0 else b"," + orjson.dumps(row))
+        if len(buffer) >= chunk_size:
+            yield b"".join(buffer)
+            buffer = []
+    buffer.append(b"]" + tail)
+    yield b"".join(buffer)
+
+def _stream_json_array(rows, head: bytes = b"", tail: bytes = b"", chunk_size: int = 100):
+    """Stream rows as a JSON array, serializing them in chunks as they are sent"""
+    return StreamingResponse(_json_array_chunks(rows, head, tail, chunk_size), media_type="application/json")
+
+# Spotify listings rarely change between page loads, so their serialized
+# bodies are kept briefly and revalidated by ETag instead of refetched
+SPOTIFY_CACHE_TTL = 60  # seconds
+_spotify_cache = TTLCache(maxsize=128, ttl=SPOTIFY_CACHE_TTL)
+_spotify_cache_lock = threading.Lock()
+
+def _cache_body(key, body: bytes):
+    entry = (body, '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest())
+    with _spotify_cache_lock:
+        _spotify_cache[key] = entry
+    return entry
+
+def _cache_entry_response(request: Request, entry) -> Response:
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={SPOTIFY_CACHE_TTL}"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if any(tag.strip() in (etag, "W/" + etag) for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+def _cached_json_response(request: Request, key, build) -> Response:
+    """Serve build() as JSON from the Spotify cache, answering 304 when the ETag matches"""
+    with _spotify_cache_lock:
+        entry = _spotify_cache.get(key)
+    if entry is None:
+        entry = _cache_body(key, orjson.dumps(build(), option=orjson.OPT_NON_STR_KEYS))
+    return _cache_entry_response(request, entry)
+
+def _cached_json_stream(request: Request, key, open_rows, head: bytes = b"", tail: bytes = b"") -> Response:
+    """Serve a JSON array from the Spotify cache, or stream open_rows() as it arrives and cache the result"""
+    with _spotify_cache_lock:
+        entry = _spotify_cache.get(key)
+    if entry is not None:
+        return _cache_entry_response(request, entry)
+    
+    # Pulling the first row makes the first upstream request before the
+    # response is committed, so auth and not-found errors still become
+    # proper HTTP errors
+    rows = iter(open_rows())
+    first = next(rows, None)
+    if first is not None:
+        rows = chain([first], rows)
+    
+    def body():
+        chunks = []
+        for chunk in _json_array_chunks(rows, head, tail):
+            chunks.append(chunk)
+            yield chunk
+        # Only a complete body is cached; the next request gets an ETag
+        _cache_body(key, b"".join(chunks))
+    
+    return StreamingResponse(body(), media_type="application/json")
+
+def _clear_spotify_cache():
+    with _spotify_cache_lock:
+        _spotify_cache.clear()
+
+# Repeat searches are answered from the response cache instead of spending
+# YouTube requests and Spotify rate limit on the same query
+_search_cache = ResponseCache("search", ttl=SEARCH_CACHE_TTL)
+
+def _cached_search(key: str, search) -> Response:
+    """Serve {"results": search()} from the search cache"""
+    body = _search_cache.get(key)
+    if body is None:
+        results = search()
+        body = orjson.dumps({"results": results})
+        # An empty list may be a swallowed upstream error, so it isn't kept
+        if results:
+            _search_cache.set(key, body)
+    return Response(body, media_type="application/json")
+
+# Manager getters - the utils modules pull in spotipy, yt-dlp and mutagen,
+# so they are imported on first use rather than when the app module loads
+@lru_cache(maxsize=None)
+def get_spotify_manager():
+    try:
+        from utils import SpotifyManager
+        spotify_manager = SpotifyManager()
+        logger.info("Spotify manager initialized - configured: %s", spotify_manager.configured)
+        return spotify_manager
+    except Exception as e:
+        logger.error("Failed to initialize Spotify manager: %s", e)
+        return None
 
-try:
-    youtube_downloader = YouTubeDownloader() if 'YouTubeDownloader' in globals() else None
-    if youtube_downloader:
+@lru_cache(maxsize=None)
+def get_youtube_downloader():
+    try:
+        # Shared with in-process download jobs
+        youtube_downloader = get_downloader()
         logger.info("YouTube downloader initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize YouTube downloader: {e}")
-    youtube_downloader = None
+        return youtube_downloader
+    except Exception as e:
+        logger.error("Failed to initialize YouTube downloader: %s", e)
+        return None
 
-try:
-    file_manager = FileManager() if 'FileManager' in globals() else None
-    if file_manager:
+@lru_cache(maxsize=None)
+def get_file_manager():
+    try:
+        from utils import FileManager
+        file_manager = FileManager()
         logger.info("File manager initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize File manager: {e}")
-    file_manager = None
+        return file_manager
+    except Exception as e:
+        logger.error("Failed to initialize File manager: %s", e)
+        return None
+
+# Spotify error payloads, shared by every route that needs Spotify
+_SETUP_INSTRUCTIONS_DETAIL = {
+    "error": "Spotify not configured",
+    "message": "Please set valid SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in your .env file",
+    "instructions": [
+        "1. Go to https://developer.spotify.com/dashboard",
+        "2. Create a new app or use an existing one",
+        "3. Copy your Client ID and Client Secret",
+        "4. Add them to your .env file",
+        "5. Add 'http://localhost:8000/auth/spotify/callback' to your app's redirect URIs",
+        "6. Restart the application"
+    ]
+}
+
+_NOT_CONFIGURED_DETAIL = {
+    "error": "Spotify not configured",
+    "message": "Please set valid SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in your .env file",
+    "setup_required": True
+}
+
+_NOT_AUTH_DETAIL = {
+    "error": "Not authenticated",
+    "message": "Please authenticate with Spotify first",
+    "auth_required": True
+}
+
+def require_spotify_manager(spotify_manager=Depends(get_spotify_manager)):
+    """Dependency returning the Spotify manager, or 503 if it is unavailable"""
+    if not spotify_manager:
+        raise HTTPException(status_code=503, detail="Spotify manager not available")
+    return spotify_manager
+
+async def require_spotify_auth(spotify_manager=Depends(require_spotify_manager)):
+    """Dependency returning a configured and authenticated Spotify manager"""
+    if not spotify_manager.configured:
+        raise HTTPException(status_code=400, detail=_NOT_CONFIGURED_DETAIL)
+    
+    # The check may refresh the token, so it runs on a worker thread; the
+    # result is recorded back here in the request's context, which the
+    # handler's thread inherits, so the manager doesn't check again
+    if not await run_in_threadpool(spotify_manager.is_authenticated):
+        raise HTTPException(status_code=401, detail=_NOT_AUTH_DETAIL)
+    spotify_manager.mark_request_authenticated()
+    
+    return spotify_manager
+
+def _spotify_http_error(e: Exception, message: str) -> HTTPException:
+    """Translate a Spotify manager error into the HTTP error sent to clients"""
+    if isinstance(e, SpotifyRateLimited):
+        headers = {"Retry-After": str(int(e.retry_after))} if e.retry_after else None
+        return HTTPException(
+            status_code=429,
+            detail={"error": "Rate limited", "message": str(e)},
+            headers=headers
+        )
+    if isinstance(e, SpotifyAuthRequired):
+        return HTTPException(
+            status_code=401, 
+            detail={
+                "error": "Authentication expired",
+                "message": str(e),
+                "auth_required": True
+            }
+        )
+    if isinstance(e, SpotifyNotConfigured):
+        return HTTPException(status_code=400, detail=_NOT_CONFIGURED_DETAIL)
+    if isinstance(e, SpotifyUnavailable):
+        return HTTPException(status_code=503, detail=f"{message}: {str(e)}")
+    return HTTPException(status_code=500, detail=f"{message}: {str(e)}")
 
 # Initialize database
 try:
     init_db()
 except Exception as e:
-    logging.warning(f"Database initialization failed: {e}")
+    logging.warning("Database initialization failed: %s", e)
 
 @app.get("/")
 async def root():
@@ -92,9 +340,20 @@ async def root():
         "status": "running"
     }
 
+# Health checks are polled constantly, so the Spotify status they report is
+# cached per time bucket instead of being re-checked on every request
+HEALTH_STATUS_TTL = 5  # seconds
+
+@lru_cache(maxsize=4)
+def _cached_auth_status(bucket: int):
+    return get_spotify_manager().get_authentication_status()
+
 @app.get("/health")
-async def health_check():
-    auth_status = spotify_manager.get_authentication_status() if spotify_manager else {
+def health_check(
+    spotify_manager=Depends(get_spotify_manager),
+    youtube_downloader=Depends(get_youtube_downloader)
+):
+    auth_status = _cached_auth_status(int(time.monotonic() // HEALTH_STATUS_TTL)) if spotify_manager else {
         "configured": False, 
         "authenticated": False, 
         "client_id_set": False, 
@@ -111,56 +370,37 @@ async def health_check():
 
 # Spotify Authentication Routes
 @app.get("/auth/spotify/login")
-async def spotify_login():
+async def spotify_login(spotify_manager=Depends(require_spotify_manager)):
     """Get Spotify authorization URL"""
-    if not spotify_manager:
-        raise HTTPException(status_code=503, detail="Spotify manager not available")
-    
     if not spotify_manager.configured:
-        raise HTTPException(
-            status_code=400, 
-            detail={
-                "error": "Spotify not configured",
-                "message": "Please set valid SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in your .env file",
-                "instructions": [
-                    "1. Go to https://developer.spotify.com/dashboard",
-                    "2. Create a new app or use an existing one",
-                    "3. Copy your Client ID and Client Secret",
-                    "4. Add them to your .env file",
-                    "5. Add 'http://localhost:8000/auth/spotify/callback' to your app's redirect URIs",
-                    "6. Restart the application"
-                ]
-            }
-        )
+        raise HTTPException(status_code=400, detail=_SETUP_INSTRUCTIONS_DETAIL)
     
     try:
         auth_url = spotify_manager.get_auth_url()
         return {"auth_url": auth_url}
     except Exception as e:
-        logger.error(f"Spotify auth URL error: {e}")
+        logger.error("Spotify auth URL error: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to get auth URL: {str(e)}")
 
 @app.get("/auth/spotify/callback")
-async def spotify_callback(code: str = Query(...)):
+def spotify_callback(code: str = Query(...), spotify_manager=Depends(require_spotify_manager)):
     """Handle Spotify authentication callback"""
-    if not spotify_manager:
-        raise HTTPException(status_code=503, detail="Spotify manager not available")
-    
     if not spotify_manager.configured:
         raise HTTPException(status_code=400, detail="Spotify not configured. Please check your environment variables.")
     
     try:
         success = spotify_manager.authenticate(code)
         if success:
+            _clear_spotify_cache()
             return {"message": "Authentication successful", "authenticated": True}
         else:
             raise HTTPException(status_code=400, detail="Authentication failed. Please try again.")
     except Exception as e:
-        logger.error(f"Spotify callback error: {e}")
+        logger.error("Spotify callback error: %s", e)
         raise HTTPException(status_code=500, detail=f"Authentication error: {str(e)}")
 
 @app.get("/auth/spotify/status")
-async def spotify_auth_status():
+def spotify_auth_status(spotify_manager=Depends(get_spotify_manager)):
     """Check Spotify authentication status"""
     if not spotify_manager:
         return {
@@ -175,38 +415,42 @@ async def spotify_auth_status():
     return spotify_manager.get_authentication_status()
 
 @app.post("/auth/spotify/logout")
-async def spotify_logout():
+async def spotify_logout(spotify_manager=Depends(require_spotify_manager)):
     """Logout from Spotify and clear tokens"""
-    if not spotify_manager:
-        raise HTTPException(status_code=503, detail="Spotify manager not available")
-    
     success = spotify_manager.logout()
+    _clear_spotify_cache()
     return {"success": success, "message": "Logged out successfully" if success else "Logout failed"}
 
 # Playlist Management Routes
 @app.get("/playlists")
-async def get_playlists(db: Session = Depends(get_db)):
+def get_playlists(db: Session = Depends(get_db)):
     """Get all local playlists"""
     try:
-        playlists = db.query(Playlist).all()
+        # Count songs in SQL rather than lazy-loading every playlist's songs
+        rows = db.execute(
+            select(Playlist, func.count(Song.id))
+            .outerjoin(Song)
+            .group_by(Playlist.id)
+        ).all()
         return [
             {
                 "id": p.id,
                 "name": p.name,
                 "category": p.category,
                 "spotify_id": p.spotify_id,
-                "song_count": len(p.songs) if p.songs else 0,
+                "song_count": song_count,
                 "created_at": p.created_at
             }
-            for p in playlists
+            for p, song_count in rows
         ]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/playlists")
-async def create_playlist(
+def create_playlist(
     request: CreatePlaylistRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    spotify_manager=Depends(get_spotify_manager)
 ):
     """Create a new playlist"""
     try:
@@ -216,7 +460,7 @@ async def create_playlist(
             raise HTTPException(status_code=400, detail="Playlist already exists")
         
         spotify_id = None
-        if request.create_spotify and spotify_manager and spotify_manager.configured and spotify_manager.sp:
+        if request.create_spotify and spotify_manager and spotify_manager.is_authenticated():
             spotify_id = spotify_manager.create_playlist(request.name, f"MediaMaestro - {request.category}")
         
         playlist = Playlist(
@@ -227,7 +471,6 @@ async def create_playlist(
         
         db.add(playlist)
         db.commit()
-        db.refresh(playlist)
         
         return {
             "id": playlist.id,
@@ -236,19 +479,40 @@ async def create_playlist(
             "spotify_id": playlist.spotify_id
         }
     except Exception as e:
-        logger.error(f"Failed to create playlist: {e}")
+        logger.error("Failed to create playlist: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 # Song Management Routes
 @app.get("/playlists/{playlist_id}/songs")
-async def get_playlist_songs(playlist_id: int, db: Session = Depends(get_db)):
-    """Get songs in a playlist"""
+def get_playlist_songs(
+    playlist_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Get the songs in a playlist; limit and offset select a page of them"""
     try:
-        playlist = db.query(Playlist).filter(Playlist.id == playlist_id).first()
+        playlist = db.get(Playlist, playlist_id)
         if not playlist:
             raise HTTPException(status_code=404, detail="Playlist not found")
         
-        return [
+        # Only hydrate the columns this response returns, and fetch them in
+        # batches while the response streams instead of all up front
+        songs = db.scalars(
+            select(Song)
+            .execution_options(yield_per=200)
+            .options(load_only(
+                Song.id, Song.title, Song.artist, Song.album,
+                Song.mp3_path, Song.flac_path, Song.video_path,
+                Song.spotify_id, Song.youtube_id, Song.duration
+            ))
+            .where(Song.playlist_id == playlist_id)
+            .order_by(Song.id)
+            .limit(limit)
+            .offset(offset)
+        )
+        
+        return _stream_json_array(
             {
                 "id": s.id,
                 "title": s.title,
@@ -261,101 +525,129 @@ async def get_playlist_songs(playlist_id: int, db: Session = Depends(get_db)):
                 "youtube_id": s.youtube_id,
                 "duration": s.duration
             }
-            for s in playlist.songs
-        ]
+            for s in songs
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # YouTube Download Routes
 @app.get("/youtube/search")
-async def search_youtube(q: str = Query(...), max_results: int = 5):
+def search_youtube(q: str = Query(...), max_results: int = 5, youtube_downloader=Depends(get_youtube_downloader)):
     """Search YouTube for videos"""
     if not youtube_downloader:
         raise HTTPException(status_code=503, detail="YouTube downloader not available")
     
     try:
-        results = youtube_downloader.search_youtube(q, max_results)
-        return {"results": results}
+        return _cached_search(
+            _search_cache.key("youtube", q, max_results),
+            lambda: youtube_downloader.search_youtube(q, max_results)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _playlist_folder(db: Session, playlist_id: Optional[int]) -> Optional[str]:
+    """Category folder downloads for a playlist are saved under"""
+    if not playlist_id:
+        return None
+    playlist = db.get(Playlist, playlist_id)
+    return playlist.category if playlist else None
+
 @app.post("/youtube/download")
-async def download_youtube(
+def download_youtube(
     url: str,
     format_type: str = "mp3",  # mp3, flac, video
     playlist_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    youtube_downloader=Depends(get_youtube_downloader)
 ):
-    """Download from YouTube"""
+    """Queue a YouTube download and return its job id for polling"""
     if not youtube_downloader:
         raise HTTPException(status_code=503, detail="YouTube downloader not available")
     
     try:
-        # Get playlist folder if specified
-        playlist_folder = None
-        if playlist_id:
-            playlist = db.query(Playlist).filter(Playlist.id == playlist_id).first()
-            if playlist:
-                playlist_folder = playlist.category
+        playlist_folder = _playlist_folder(db, playlist_id)
         
         # Create download job
         job = DownloadJob(url=url, status="pending")
         db.add(job)
         db.commit()
-        db.refresh(job)
         
-        # Start download (in a real app, this would be async)
-        if format_type in ["mp3", "flac"]:
-            result = youtube_downloader.download_audio(url, format_type, playlist_folder)
-        else:
-            result = youtube_downloader.download_video(url, playlist_folder)
+        # The download runs on a Celery worker, or on the local download
+        # pool when no broker is configured
+        enqueue_download(job.id, url, format_type, playlist_folder, playlist_id)
         
-        # Update job status
-        if result.get('success'):
-            job.status = "completed"
-            job.progress = 100
-            
-            # Create song record if successful
-            if playlist_id:
-                song = Song(
-                    title=result.get('title'),
-                    artist=result.get('uploader'),
-                    youtube_id=result.get('youtube_id'),
-                    playlist_id=playlist_id
-                )
-                
-                if format_type == "mp3":
-                    song.mp3_path = result.get('file_path')
-                elif format_type == "flac":
-                    song.flac_path = result.get('file_path')
-                elif format_type == "video":
-                    song.video_path = result.get('file_path')
-                
-                db.add(song)
-        else:
-            job.status = "failed"
-            job.error_message = result.get('error')
+        return {
+            "job_id": job.id,
+            "status": job.status
+        }
         
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/youtube/download_batch")
+def download_youtube_batch(
+    request: DownloadBatchRequest,
+    db: Session = Depends(get_db),
+    youtube_downloader=Depends(get_youtube_downloader)
+):
+    """Queue several YouTube downloads and return their job ids for polling"""
+    if not youtube_downloader:
+        raise HTTPException(status_code=503, detail="YouTube downloader not available")
+    
+    try:
+        playlist_folder = _playlist_folder(db, request.playlist_id)
+        
+        # One multi-row INSERT ... RETURNING instead of a flush per job
+        job_ids = db.scalars(
+            insert(DownloadJob).returning(DownloadJob.id, sort_by_parameter_order=True),
+            [{"url": url, "status": "pending"} for url in request.urls]
+        ).all()
         db.commit()
         
+        for job_id, url in zip(job_ids, request.urls):
+            enqueue_download(job_id, url, request.format_type, playlist_folder, request.playlist_id)
+        
         return {
-            "job_id": job.id,
-            "status": job.status,
-            "result": result
+            "jobs": [
+                {"job_id": job_id, "url": url, "status": "pending"}
+                for job_id, url in zip(job_ids, request.urls)
+            ]
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/youtube/jobs/{job_id}")
+def get_download_job(job_id: int, db: Session = Depends(get_db)):
+    """Get the status of a download job"""
+    job = db.get(DownloadJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Download job not found")
+    
+    return {
+        "job_id": job.id,
+        "url": job.url,
+        "status": job.status,
+        "progress": job.progress,
+        "error": job.error_message,
+        "song_id": job.song_id,
+        "created_at": job.created_at,
+        "completed_at": job.completed_at
+    }
+
 # File Management Routes
 @app.get("/files/organize/{playlist_id}")
-async def organize_playlist_files(playlist_id: int, db: Session = Depends(get_db)):
+def organize_playlist_files(
+    playlist_id: int,
+    db: Session = Depends(get_db),
+    youtube_downloader=Depends(get_youtube_downloader)
+):
     """Organize and tally files in a playlist"""
     if not youtube_downloader:
         raise HTTPException(status_code=503, detail="YouTube downloader not available")
     
     try:
-        playlist = db.query(Playlist).filter(Playlist.id == playlist_id).first()
+        playlist = db.get(Playlist, playlist_id)
         if not playlist:
             raise HTTPException(status_code=404, detail="Playlist not found")
         
@@ -367,136 +659,60 @@ async def organize_playlist_files(playlist_id: int, db: Session = Depends(get_db
 
 # Spotify Integration Routes
 @app.get("/spotify/search")
-async def search_spotify(q: str = Query(...), artist: Optional[str] = None):
+def search_spotify(q: str = Query(...), artist: Optional[str] = None, spotify_manager=Depends(require_spotify_auth)):
     """Search Spotify for tracks"""
-    if not spotify_manager:
-        raise HTTPException(status_code=503, detail="Spotify manager not available")
-    
-    if not spotify_manager.configured:
-        raise HTTPException(
-            status_code=400, 
-            detail={
-                "error": "Spotify not configured",
-                "message": "Please set valid SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in your .env file",
-                "setup_required": True
-            }
-        )
-    
-    if not spotify_manager.is_authenticated():
-        raise HTTPException(
-            status_code=401, 
-            detail={
-                "error": "Not authenticated",
-                "message": "Please authenticate with Spotify first",
-                "auth_required": True
-            }
-        )
-    
     try:
-        results = spotify_manager.search_track(q, artist)
-        return {"results": results}
+        return {"results": spotify_manager.search_track(q, artist)}
     except Exception as e:
-        logger.error(f"Spotify search error: {e}")
-        if "authentication" in str(e).lower() or "token" in str(e).lower():
-            raise HTTPException(
-                status_code=401, 
-                detail={
-                    "error": "Authentication expired",
-                    "message": str(e),
-                    "auth_required": True
-                }
-            )
-        raise HTTPException(status_code=500, detail=f"Spotify search failed: {str(e)}")
-
+        logger.error("Spotify search error: %s", e)
+        raise _spotify_http_error(e, "Spotify search failed")
 
+@app.post("/spotify/search_bulk")
+def search_spotify_bulk(request: SpotifyBulkSearchRequest, spotify_manager=Depends(require_spotify_auth)):
+    """Search Spotify for many tracks at once; results follow the order of the queries"""
+    try:
+        queries = [(query.q, query.artist) for query in request.queries]
+        return {"results": spotify_manager.search_tracks_bulk(queries)}
+    except Exception as e:
+        logger.error("Spotify bulk search error: %s", e)
+        raise _spotify_http_error(e, "Spotify search failed")
 
 @app.get("/spotify/playlists")
-async def get_spotify_playlists():
-    """Get user's Spotify playlists"""
-    if not spotify_manager:
-        raise HTTPException(status_code=503, detail="Spotify manager not available")
-    
-    if not spotify_manager.configured:
-        raise HTTPException(
-            status_code=400, 
-            detail={
-                "error": "Spotify not configured",
-                "message": "Please set valid SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in your .env file",
-                "setup_required": True
-            }
-        )
-    
-    if not spotify_manager.is_authenticated():
-        raise HTTPException(
-            status_code=401, 
-            detail={
-                "error": "Not authenticated",
-                "message": "Please authenticate with Spotify first",
-                "auth_required": True
+def get_spotify_playlists(request: Request, detailed: bool = False, spotify_manager=Depends(require_spotify_auth)):
+    """Get user's Spotify playlists; detailed adds images and follower counts"""
+    try:
+        return _cached_json_response(
+            request,
+            ("playlists", detailed),
+            lambda: {
+                "playlists": spotify_manager.get_user_playlists_detailed() if detailed
+                else spotify_manager.get_user_playlists()
             }
         )
-    
-    try:
-        playlists = spotify_manager.get_user_playlists()
-        return {"playlists": playlists}
     except Exception as e:
-        logger.error(f"Spotify playlists error: {e}")
-        if "authentication" in str(e).lower() or "token" in str(e).lower():
-            raise HTTPException(
-                status_code=401, 
-                detail={
-                    "error": "Authentication expired",
-                    "message": str(e),
-                    "auth_required": True
-                }
-            )
-        raise HTTPException(status_code=500, detail=f"Failed to get playlists: {str(e)}")
+        logger.error("Spotify playlists error: %s", e)
+        raise _spotify_http_error(e, "Failed to get playlists")
 
 @app.get("/spotify/playlists/{playlist_id}/tracks")
-async def get_spotify_playlist_tracks(playlist_id: str):
+def get_spotify_playlist_tracks(request: Request, playlist_id: str, spotify_manager=Depends(require_spotify_auth)):
     """Get tracks from a specific Spotify playlist"""
-    if not spotify_manager:
-        raise HTTPException(status_code=503, detail="Spotify manager not available")
-    
-    if not spotify_manager.configured:
-        raise HTTPException(
-            status_code=400, 
-            detail={
-                "error": "Spotify not configured",
-                "message": "Please set valid SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in your .env file",
-                "setup_required": True
-            }
-        )
-    
-    if not spotify_manager.is_authenticated():
-        raise HTTPException(
-            status_code=401, 
-            detail={
-                "error": "Not authenticated",
-                "message": "Please authenticate with Spotify first",
-                "auth_required": True
-            }
-        )
-    
     try:
-        tracks = spotify_manager.get_playlist_tracks(playlist_id)
-        return {"tracks": tracks, "playlist_id": playlist_id}
+        # Tracks are sent page by page as Spotify returns them
+        return _cached_json_stream(
+            request,
+            ("tracks", playlist_id),
+            lambda: spotify_manager.iter_playlist_tracks(playlist_id),
+            head=b'{"playlist_id":' + orjson.dumps(playlist_id) + b',"tracks":',
+            tail=b"}"
+        )
     except Exception as e:
-        logger.error(f"Spotify playlist tracks error: {e}")
-        if "authentication" in str(e).lower() or "token" in str(e).lower():
-            raise HTTPException(
-                status_code=401, 
-                detail={
-                    "error": "Authentication expired",
-                    "message": str(e),
-                    "auth_required": True
-                }
-            )
-        raise HTTPException(status_code=500, detail=f"Failed to get playlist tracks: {str(e)}")
+        logger.error("Spotify playlist tracks error: %s", e)
+        raise _spotify_http_error(e, "Failed to get playlist tracks")
 
-# File Management Routes
+# File Management Routes - scans, copies and tag reads block on disk, so
+# these are plain `def` handlers run on the worker threads
 @app.get("/files/scan")
-async def scan_media_files():
+def scan_media_files(file_manager=Depends(get_file_manager)):
     """Scan all media files and return organization status"""
     if not file_manager:
         raise HTTPException(status_code=503, detail="File manager not available")
@@ -505,11 +721,11 @@ async def scan_media_files():
         result = file_manager.scan_media_directory()
         return result
     except Exception as e:
-        logger.error(f"File scan error: {e}")
+        logger.error("File scan error: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to scan files: {str(e)}")
 
 @app.post("/files/copy")
-async def copy_files_to_media(request: CopyFilesRequest):
+def copy_files_to_media(request: CopyFilesRequest, file_manager=Depends(get_file_manager)):
     """Copy files from external locations to media directory"""
     if not file_manager:
         raise HTTPException(status_code=503, detail="File manager not available")
@@ -521,11 +737,11 @@ async def copy_files_to_media(request: CopyFilesRequest):
         )
         return result
     except Exception as e:
-        logger.error(f"File copy error: {e}")
+        logger.error("File copy error: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to copy files: {str(e)}")
 
 @app.get("/files/missing/{playlist_key}")
-async def find_missing_formats(playlist_key: str):
+def find_missing_formats(playlist_key: str, file_manager=Depends(get_file_manager)):
     """Find songs missing in certain formats for a playlist"""
     if not file_manager:
         raise HTTPException(status_code=503, detail="File manager not available")
@@ -534,18 +750,19 @@ async def find_missing_formats(playlist_key: str):
         result = file_manager.find_missing_formats(playlist_key)
         return result
     except Exception as e:
-        logger.error(f"Missing formats check error: {e}")
+        logger.error("Missing formats check error: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to check missing formats: {str(e)}")
 
 @app.post("/files/match-spotify")
-async def match_with_spotify_playlist(request: MatchPlaylistRequest):
+def match_with_spotify_playlist(
+    request: MatchPlaylistRequest,
+    file_manager=Depends(get_file_manager),
+    spotify_manager=Depends(require_spotify_manager)
+):
     """Match local files with Spotify playlist"""
     if not file_manager:
         raise HTTPException(status_code=503, detail="File manager not available")
     
-    if not spotify_manager:
-        raise HTTPException(status_code=503, detail="Spotify manager not available")
-    
     try:
         # Get Spotify playlist tracks if playlist ID provided
         spotify_tracks = []
@@ -556,8 +773,10 @@ async def match_with_spotify_playlist(request: MatchPlaylistRequest):
         
         result = file_manager.match_with_spotify_tracks(request.playlist_key, spotify_tracks)
         return result
+    except SpotifyError as e:
+        raise _spotify_http_error(e, "Failed to match with Spotify")
     except Exception as e:
-        logger.error(f"Spotify matching error: {e}")
+        logger.error("Spotify matching error: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to match with Spotify: {str(e)}")
 
 @app.get("/config/media-directory")
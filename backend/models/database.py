@@ -1,11 +1,19 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import create_engine, event, Column, BigInteger, Integer, Float, String, DateTime, Boolean, ForeignKey, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.pool import QueuePool
 from datetime import datetime
 import sqlite3
 
+from config import DATABASE_URL, DEBUG
+
 Base = declarative_base()
 
+# In debug mode, touching an unloaded relationship raises instead of quietly
+# issuing a query per row, so N+1 patterns surface during development.
+# Load what a route needs with selectinload() or aggregate it in SQL.
+_RELATIONSHIP_LAZY = "raise_on_sql" if DEBUG else "select"
+
 class Playlist(Base):
     __tablename__ = "playlists"
     
@@ -15,7 +23,7 @@ class Playlist(Base):
     spotify_id = Column(String, unique=True, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    songs = relationship("Song", back_populates="playlist")
+    songs = relationship("Song", back_populates="playlist", lazy=_RELATIONSHIP_LAZY)
 
 class Song(Base):
     __tablename__ = "songs"
@@ -40,8 +48,8 @@ class Song(Base):
     quality = Column(String, nullable=True)  # 320kbps, FLAC, etc.
     
     # Relationships
-    playlist_id = Column(Integer, ForeignKey("playlists.id"))
-    playlist = relationship("Playlist", back_populates="songs")
+    playlist_id = Column(Integer, ForeignKey("playlists.id"), index=True)
+    playlist = relationship("Playlist", back_populates="songs", lazy=_RELATIONSHIP_LAZY)
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -53,19 +61,70 @@ class DownloadJob(Base):
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String)
     song_id = Column(Integer, ForeignKey("songs.id"), nullable=True)
-    status = Column(String, default="pending")  # pending, downloading, completed, failed
+    status = Column(String, default="pending", index=True)  # pending, downloading, completed, failed
     progress = Column(Integer, default=0)  # 0-100
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
 
+class MediaFile(Base):
+    __tablename__ = "media_files"
+    
+    # Last scanned state of a file in the media directory; a rescan only
+    # re-reads tags when the size or mtime recorded here no longer match
+    path = Column(String, primary_key=True)
+    folder = Column(String, index=True)
+    size = Column(BigInteger)
+    mtime_ns = Column(BigInteger)
+    
+    # Metadata
+    title = Column(String)
+    artist = Column(String)
+    album = Column(String)
+    duration = Column(Float)
+    bitrate = Column(Integer)
+    format = Column(String)
+    
+    scanned_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 # Database setup
-DATABASE_URL = "sqlite:///./mediamaestro.db"
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_is_sqlite = DATABASE_URL.startswith("sqlite")
+
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=QueuePool,
+    pool_size=20,
+    max_overflow=10,
+    pool_pre_ping=True,
+    # Pooled SQLite connections are handed between request and download
+    # worker threads; writers wait on the lock rather than failing at once
+    connect_args={"check_same_thread": False, "timeout": 15} if _is_sqlite else {}
+)
+if _is_sqlite:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, connection_record):
+        # WAL lets readers proceed while a download job is writing, and
+        # synchronous=NORMAL drops the fsync on every commit
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-20000")
+        cursor.close()
+
+# expire_on_commit=False keeps attributes loaded after commit, so reading
+# e.g. a new row's id does not issue another SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    
+    # create_all skips tables that already exist, so indexes added to a model
+    # later would never reach an existing database without this
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 def get_db():
     db = SessionLocal()
@@ -0,0 +1,133 @@
+"""
+Download jobs, run either in-process or on Celery workers.
+
+When CELERY_BROKER_URL is set the API only records the job and enqueues it;
+downloads then scale with the number of workers instead of tying up the
+API process. Without a broker the same function runs on a local thread
+pool that adapts its concurrency to the measured download throughput.
+"""
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+import logging
+
+from sqlalchemy import update
+
+from config import CELERY_BROKER_URL, CELERY_RESULT_BACKEND, DL_CONCURRENCY, DL_MAX_CONCURRENCY
+from models.database import SessionLocal, Song, DownloadJob
+from utils.download_pool import AdaptiveDownloadPool
+
+logger = logging.getLogger(__name__)
+
+# In-process downloads start at DL_CONCURRENCY and the pool steps that up or
+# down every few seconds depending on whether bytes/s improved
+download_pool = AdaptiveDownloadPool(initial=DL_CONCURRENCY, max_workers=DL_MAX_CONCURRENCY)
+
+@lru_cache(maxsize=None)
+def get_downloader():
+    from utils import YouTubeDownloader
+    youtube_downloader = YouTubeDownloader()
+    youtube_downloader.progress_hooks.append(download_pool.progress_hook)
+    return youtube_downloader
+
+def run_download_job(
+    job_id: int,
+    url: str,
+    format_type: str,
+    playlist_folder: Optional[str],
+    playlist_id: Optional[int]
+):
+    """Run a download job outside the request and record the outcome"""
+    # Committed on its own so pollers see the job start while the download
+    # is still running
+    try:
+        with SessionLocal() as db, db.begin():
+            db.execute(
+                update(DownloadJob)
+                .where(DownloadJob.id == job_id, DownloadJob.status == "pending")
+                .values(status="downloading")
+            )
+    except Exception as e:
+        logger.error("Failed to mark download job %s as downloading: %s", job_id, e)
+    
+    try:
+        youtube_downloader = get_downloader()
+        if format_type in ["mp3", "flac"]:
+            result = youtube_downloader.download_audio(url, format_type, playlist_folder)
+        else:
+            result = youtube_downloader.download_video(url, playlist_folder)
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+    
+    if 'HTTP Error 429' in str(result.get('error', '')):
+        download_pool.report_throttled()
+    
+    # Each job opens its own session; no transaction is held open during the
+    # download, and the song insert and job update are committed together
+    try:
+        with SessionLocal() as db, db.begin():
+            job = db.get(DownloadJob, job_id)
+            if not job:
+                logger.error("Download job %s not found", job_id)
+                return
+            
+            if result.get('success'):
+                job.status = "completed"
+                job.progress = 100
+                
+                # Create song record if successful
+                if playlist_id:
+                    song = Song(
+                        title=result.get('title'),
+                        artist=result.get('uploader'),
+                        youtube_id=result.get('youtube_id'),
+                        playlist_id=playlist_id
+                    )
+                    
+                    if format_type == "mp3":
+                        song.mp3_path = result.get('file_path')
+                    elif format_type == "flac":
+                        song.flac_path = result.get('file_path')
+                    elif format_type == "video":
+                        song.video_path = result.get('file_path')
+                    
+                    db.add(song)
+                    db.flush()
+                    job.song_id = song.id
+            else:
+                job.status = "failed"
+                job.error_message = result.get('error')
+            
+            job.completed_at = datetime.utcnow()
+    except Exception as e:
+        # e.g. the video is already in the library - keep the job from
+        # staying "pending" forever
+        logger.error("Failed to record download job %s: %s", job_id, e)
+        with SessionLocal() as db, db.begin():
+            job = db.get(DownloadJob, job_id)
+            if job:
+                job.status = "failed"
+                job.error_message = str(e)
+                job.completed_at = datetime.utcnow()
+
+# Celery is optional (pip install "celery[redis]"); start a worker with
+#   celery -A tasks.celery_app worker
+celery_app = None
+download_youtube_task = None
+
+if CELERY_BROKER_URL:
+    from celery import Celery
+    
+    celery_app = Celery(
+        "mediamaestro",
+        broker=CELERY_BROKER_URL,
+        backend=CELERY_RESULT_BACKEND or None
+    )
+    download_youtube_task = celery_app.task(name="mediamaestro.download_youtube")(run_download_job)
+
+def enqueue_download(*args):
+    """Send a download job to Celery if configured, else to the local worker pool"""
+    if download_youtube_task is not None:
+        download_youtube_task.delay(*args)
+    else:
+        download_pool.submit(run_download_job, *args)
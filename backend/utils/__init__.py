@@ -0,0 +1,21 @@
+"""Spotify, YouTube and file-system helpers.
+
+Each manager wraps a heavy third-party SDK (spotipy, yt-dlp, mutagen), so
+the classes are resolved on first attribute access instead of when the
+package is imported.
+"""
+import importlib
+
+_LAZY_ATTRS = {
+    "SpotifyManager": ".spotify_manager",
+    "YouTubeDownloader": ".youtube_downloader",
+    "FileManager": ".file_manager",
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,181 @@
+"""Header-only tag and duration reader for the files the downloader produces.
+
+mutagen loads every tag frame (cover art included) and builds its own
+objects for them. A library scan only needs three text fields plus the
+duration and bitrate, and those live in the first few KB of the file. This
+module seeks past everything else. It returns None for any layout it does
+not handle (ID3v2.2, unsynchronised tags, non-Layer-III audio, ...), so
+callers can fall back to mutagen.
+"""
+import os
+import struct
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional
+
+_ID3_FRAMES = {b'TIT2': 'title', b'TPE1': 'artist', b'TALB': 'album'}
+_VORBIS_KEYS = {'TITLE': 'title', 'ARTIST': 'artist', 'ALBUM': 'album'}
+_TEXT_ENCODINGS = ('latin-1', 'utf-16', 'utf-16-be', 'utf-8')
+
+# Layer III bitrates in kbps by bitrate index, for MPEG-1 and MPEG-2/2.5
+_MPEG1_BITRATES = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_MPEG2_BITRATES = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+# Enough to reach the first MPEG frame and its Xing/VBRI header after padding
+_FRAME_SEARCH_BYTES = 8192
+
+def read_audio_info(file_path: Path) -> Optional[Dict]:
+    """Title, artist, album, duration and bitrate of an MP3 or FLAC file, or None if unsupported"""
+    suffix = file_path.suffix.lower()
+    try:
+        with open(file_path, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            if suffix == '.mp3':
+                return _read_mp3(f, file_size)
+            if suffix == '.flac':
+                return _read_flac(f, file_size)
+    except (OSError, ValueError, struct.error):
+        pass
+    return None
+
+def _syncsafe(data: bytes) -> int:
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+def _decode_text_frame(payload: bytes) -> Optional[str]:
+    if not payload or payload[0] >= len(_TEXT_ENCODINGS):
+        return None
+    text = payload[1:].decode(_TEXT_ENCODINGS[payload[0]], errors='replace')
+    # ID3v2.4 separates multiple values with NUL; keep the first like mutagen's frame[0]
+    return text.split('\x00', 1)[0] or None
+
+def _read_id3(f: BinaryIO, info: Dict) -> Optional[int]:
+    """Fill info from an ID3v2.3/2.4 tag and return where the audio starts, or None if unsupported"""
+    header = f.read(10)
+    if len(header) < 10 or header[:3] != b'ID3':
+        return 0
+    version, flags = header[3], header[5]
+    # Whole-tag unsynchronisation rewrites frame bytes; leave it to mutagen
+    if version not in (3, 4) or flags & 0x80:
+        return None
+    end = 10 + _syncsafe(header[6:10]) + (10 if flags & 0x10 else 0)
+    
+    pos = 10
+    if flags & 0x40:
+        ext = f.read(4)
+        pos += _syncsafe(ext) if version == 4 else 4 + struct.unpack('>I', ext)[0]
+    
+    while pos + 10 <= end:
+        f.seek(pos)
+        frame_header = f.read(10)
+        frame_id = frame_header[:4]
+        if len(frame_header) < 10 or frame_id[0] == 0:
+            break  # padding
+        size = _syncsafe(frame_header[4:8]) if version == 4 else struct.unpack('>I', frame_header[4:8])[0]
+        key = _ID3_FRAMES.get(frame_id)
+        if key is not None:
+            # Compressed, encrypted or per-frame unsynchronised frames
+            if frame_header[9]:
+                return None
+            info[key] = _decode_text_frame(f.read(size))
+        pos += 10 + size
+    return end
+
+def _read_mp3(f: BinaryIO, file_size: int) -> Optional[Dict]:
+    info = {'title': None, 'artist': None, 'album': None, 'format': 'MP3'}
+    audio_start = _read_id3(f, info)
+    if audio_start is None:
+        return None
+    
+    f.seek(audio_start)
+    data = f.read(_FRAME_SEARCH_BYTES)
+    start = data.find(b'\xff')
+    while start != -1 and start + 4 <= len(data):
+        if data[start + 1] & 0xE0 == 0xE0:
+            break
+        start = data.find(b'\xff', start + 1)
+    else:
+        return None
+    
+    b1, b2, b3 = data[start + 1], data[start + 2], data[start + 3]
+    version = (b1 >> 3) & 3
+    layer = (b1 >> 1) & 3
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    
+    mpeg1 = version == 3
+    mono = b3 >> 6 == 3
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    frame_bitrate = (_MPEG1_BITRATES if mpeg1 else _MPEG2_BITRATES)[bitrate_index] * 1000
+    samples_per_frame = 1152 if mpeg1 else 576
+    audio_size = file_size - audio_start - start
+    
+    frames = audio_bytes = None
+    xing = start + 4 + ((17 if mono else 32) if mpeg1 else (9 if mono else 17))
+    if data[xing:xing + 4] in (b'Xing', b'Info'):
+        xing_flags = struct.unpack('>I', data[xing + 4:xing + 8])[0]
+        offset = xing + 8
+        if xing_flags & 1:
+            frames = struct.unpack('>I', data[offset:offset + 4])[0]
+            offset += 4
+        if xing_flags & 2:
+            audio_bytes = struct.unpack('>I', data[offset:offset + 4])[0]
+    elif data[start + 36:start + 40] == b'VBRI':
+        audio_bytes, frames = struct.unpack('>II', data[start + 46:start + 54])
+    
+    if frames:
+        info['duration'] = frames * samples_per_frame / sample_rate
+        info['bitrate'] = int((audio_bytes or audio_size) * 8 / info['duration'])
+    else:
+        # No VBR header: assume constant bitrate throughout
+        info['duration'] = audio_size * 8 / frame_bitrate
+        info['bitrate'] = frame_bitrate
+    return info
+
+def _read_flac(f: BinaryIO, file_size: int) -> Optional[Dict]:
+    if f.read(4) != b'fLaC':
+        return None
+    info = {'title': None, 'artist': None, 'album': None, 'format': 'FLAC'}
+    sample_rate = total_samples = 0
+    
+    last = False
+    while not last:
+        block_header = f.read(4)
+        if len(block_header) < 4:
+            return None
+        last = bool(block_header[0] & 0x80)
+        block_type = block_header[0] & 0x7F
+        length = int.from_bytes(block_header[1:4], 'big')
+        
+        if block_type == 0:
+            streaminfo = f.read(length)
+            packed = struct.unpack('>Q', streaminfo[10:18])[0]
+            sample_rate = packed >> 44
+            total_samples = packed & 0xFFFFFFFFF
+        elif block_type == 4:
+            _read_vorbis_comments(f.read(length), info)
+        else:
+            # Pictures, seek tables and padding
+            f.seek(length, os.SEEK_CUR)
+    
+    if not sample_rate:
+        return None
+    info['duration'] = total_samples / sample_rate
+    info['bitrate'] = int((file_size - f.tell()) * 8 / info['duration']) if total_samples else 0
+    return info
+
+def _read_vorbis_comments(block: bytes, info: Dict):
+    vendor_length = struct.unpack_from('<I', block)[0]
+    offset = 4 + vendor_length
+    count = struct.unpack_from('<I', block, offset)[0]
+    offset += 4
+    for _ in range(count):
+        length = struct.unpack_from('<I', block, offset)[0]
+        offset += 4
+        name, _, value = block[offset:offset + length].decode('utf-8', errors='replace').partition('=')
+        offset += length
+        key = _VORBIS_KEYS.get(name.upper())
+        # First value wins, as with mutagen's audio.get(KEY)[0]
+        if key is not None and info[key] is None:
+            info[key] = value
@@ -0,0 +1,118 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional, Tuple
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class AdaptiveDownloadPool:
+    """Thread pool that tunes how many downloads run at once from measured throughput"""
+    
+    def __init__(self, initial: int = 4, min_workers: int = 1, max_workers: int = 16, probe_interval: float = 3.0):
+        self.min_workers = min_workers
+        self.max_workers = max(max_workers, min_workers)
+        self.probe_interval = probe_interval
+        
+        # Threads are capped at max_workers; _limit decides how many of them
+        # may be downloading at any moment
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="download")
+        self._limit = min(max(initial, min_workers), self.max_workers)
+        self._active = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+        
+        # (timestamp, bytes) reported by the yt-dlp progress hooks
+        self._samples: Deque[Tuple[float, int]] = deque()
+        self._seen_bytes: Dict[str, int] = {}
+        
+        self._step = 1
+        self._last_throughput: Optional[float] = None
+        self._tuner: Optional[threading.Thread] = None
+    
+    @property
+    def limit(self) -> int:
+        return self._limit
+    
+    def submit(self, fn: Callable, *args) -> Future:
+        """Queue fn(*args); it starts once the current concurrency limit allows"""
+        self._start_tuner()
+        return self._executor.submit(self._run, fn, *args)
+    
+    def progress_hook(self, d: Dict):
+        """yt-dlp progress hook that records downloaded bytes"""
+        status = d.get('status')
+        if status not in ('downloading', 'finished'):
+            return
+        
+        filename = d.get('filename')
+        downloaded = d.get('downloaded_bytes') or 0
+        with self._cond:
+            delta = downloaded - self._seen_bytes.get(filename, 0)
+            if status == 'finished':
+                self._seen_bytes.pop(filename, None)
+            else:
+                self._seen_bytes[filename] = downloaded
+            if delta > 0:
+                self._samples.append((time.monotonic(), delta))
+    
+    def report_throttled(self):
+        """Halve the concurrency after the server answered 429 Too Many Requests"""
+        with self._cond:
+            self._set_limit(self._limit // 2)
+            self._step = -1
+            self._last_throughput = None
+    
+    def _run(self, fn: Callable, *args):
+        with self._cond:
+            self._waiting += 1
+            while self._active >= self._limit:
+                self._cond.wait()
+            self._waiting -= 1
+            self._active += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify()
+    
+    def _start_tuner(self):
+        with self._cond:
+            if self._tuner is None:
+                self._tuner = threading.Thread(target=self._tune, name="download-tuner", daemon=True)
+                self._tuner.start()
+    
+    def _tune(self):
+        # Hill climb on throughput: keep stepping the limit in the same
+        # direction while bytes/s improves, turn around when it drops
+        while True:
+            time.sleep(self.probe_interval)
+            cutoff = time.monotonic() - self.probe_interval
+            with self._cond:
+                while self._samples and self._samples[0][0] < cutoff:
+                    self._samples.popleft()
+                throughput = sum(size for _, size in self._samples) / self.probe_interval
+                
+                # Only a saturated pool says anything about the right limit
+                if self._active < self._limit:
+                    self._last_throughput = None
+                    continue
+                
+                if self._last_throughput is not None and throughput < self._last_throughput:
+                    self._step = -self._step
+                self._last_throughput = throughput
+                
+                # Growing only helps when jobs are queued behind the limit
+                if self._step > 0 and not self._waiting:
+                    continue
+                self._set_limit(self._limit + self._step)
+    
+    def _set_limit(self, limit: int):
+        # Callers hold self._cond
+        limit = min(max(limit, self.min_workers), self.max_workers)
+        if limit != self._limit:
+            logger.debug("Download concurrency %s -> %s", self._limit, limit)
+            self._limit = limit
+            self._cond.notify_all()
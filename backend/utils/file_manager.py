@@ -1,21 +1,159 @@
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, FrozenSet, List, Optional, Tuple
 import logging
-from difflib import SequenceMatcher
-from config import MEDIA_DIR, PLAYLISTS
+from config import MEDIA_DIR, PLAYLISTS, AUDIO_EXTENSIONS, VIDEO_EXTENSIONS, ensure_dir, ensure_media_dirs
 from mutagen.mp3 import MP3
 from mutagen.flac import FLAC
+from rapidfuzz import fuzz, process
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.database import SessionLocal, MediaFile
+from utils.audio_tags import read_audio_info
 import re
+import sys
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+# Used by the normalizers on every scanned file name
+_RE_NONWORD = re.compile(r'[^\w\s]')
+_RE_WHITESPACE = re.compile(r'\s+')
+
+# Metadata fields persisted per file in the media_files table
+_METADATA_FIELDS = ('title', 'artist', 'album', 'duration', 'bitrate', 'format')
+
+# Reading tags is mostly waiting on disk, so headers are read concurrently
+_metadata_executor = ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 1) * 2),
+    thread_name_prefix="metadata"
+)
+
+def _list_files(directory: Path, extensions: Optional[FrozenSet[str]] = None) -> List[os.DirEntry]:
+    """List the files in a directory, optionally filtered by extension"""
+    # DirEntry caches the file type and stat from the directory read, which
+    # saves the per-file stat calls Path.iterdir() would cost
+    try:
+        with os.scandir(directory) as it:
+            return [
+                entry for entry in it
+                if entry.is_file()
+                and (extensions is None or os.path.splitext(entry.name)[1].lower() in extensions)
+            ]
+    except FileNotFoundError:
+        return []
+
+# FICLONE from <linux/fs.h>: make the target share the source's blocks
+# (copy-on-write) on btrfs, XFS and other reflink-capable filesystems
+_FICLONE = 0x40049409 if fcntl and sys.platform.startswith('linux') else None
+
+def _copy_file(source: Path, target: Path):
+    """Copy a file and its metadata, cloning it instead where the filesystem allows"""
+    cloned = False
+    if _FICLONE is not None:
+        try:
+            with open(source, 'rb') as src, open(target, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            cloned = True
+        except OSError:
+            # No reflink support, or source and target are on different filesystems
+            pass
+    
+    if not cloned:
+        # copyfile uses sendfile/fcopyfile where available, so the data
+        # never passes through a Python buffer
+        shutil.copyfile(source, target)
+    shutil.copystat(source, target)
+
+@lru_cache(maxsize=8192)
+def _normalize(text: str) -> str:
+    # Remove special characters, then collapse whitespace; the same names
+    # come up on every scan and match, so results are memoized
+    return _RE_WHITESPACE.sub(' ', _RE_NONWORD.sub('', text.lower())).strip()
+
+def _dir_mtime_ns(directory: Path) -> int:
+    try:
+        return directory.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+@lru_cache(maxsize=4096)
+def _read_metadata_cached(path: str, mtime_ns: int) -> Dict:
+    # mtime_ns is only used as part of the cache key, so a rewritten file is read again
+    return _read_metadata(Path(path))
+
+_FORMAT_EXTENSIONS = {'mp3': AUDIO_EXTENSIONS, 'flac': AUDIO_EXTENSIONS, 'video': VIDEO_EXTENSIONS}
+
+@lru_cache(maxsize=16)
+def _song_identifiers(playlist_dir: str, mtimes: Tuple[int, ...]) -> FrozenSet[str]:
+    # mtimes is only used as part of the cache key, like _read_metadata_cached's mtime_ns
+    names = set()
+    for format_type, extensions in _FORMAT_EXTENSIONS.items():
+        for entry in _list_files(Path(playlist_dir) / format_type, extensions):
+            # Use metadata title/artist (the extractor falls back to the filename)
+            metadata = _read_metadata_cached(entry.path, entry.stat().st_mtime_ns)
+            names.add(_normalize(f"{metadata['title']} - {metadata['artist']}"))
+    return frozenset(names)
+
+def _read_metadata(file_path: Path) -> Dict:
+    """Extract metadata from audio/video file"""
+    try:
+        info = read_audio_info(file_path)
+        if info is not None:
+            for key in ('title', 'artist', 'album'):
+                info[key] = info[key] or 'Unknown'
+            return info
+        
+        # Tag layouts the header reader skips go through mutagen
+        if file_path.suffix.lower() == '.mp3':
+            audio = MP3(file_path)
+            return {
+                'title': str(audio.get('TIT2', ['Unknown'])[0]) if audio.get('TIT2') else 'Unknown',
+                'artist': str(audio.get('TPE1', ['Unknown'])[0]) if audio.get('TPE1') else 'Unknown',
+                'album': str(audio.get('TALB', ['Unknown'])[0]) if audio.get('TALB') else 'Unknown',
+                'duration': getattr(audio.info, 'length', 0),
+                'bitrate': getattr(audio.info, 'bitrate', 0),
+                'format': 'MP3'
+            }
+        elif file_path.suffix.lower() == '.flac':
+            audio = FLAC(file_path)
+            return {
+                'title': audio.get('TITLE', ['Unknown'])[0] if audio.get('TITLE') else 'Unknown',
+                'artist': audio.get('ARTIST', ['Unknown'])[0] if audio.get('ARTIST') else 'Unknown',
+                'album': audio.get('ALBUM', ['Unknown'])[0] if audio.get('ALBUM') else 'Unknown',
+                'duration': getattr(audio.info, 'length', 0),
+                'bitrate': getattr(audio.info, 'bitrate', 0),
+                'format': 'FLAC'
+            }
+    except Exception as e:
+        logger.error("Failed to extract metadata from %s: %s", file_path, e)
+    
+    return {
+        'title': file_path.stem,
+        'artist': 'Unknown',
+        'album': 'Unknown',
+        'duration': 0,
+        'bitrate': 0,
+        'format': file_path.suffix.upper()[1:]  # Remove the dot
+    }
+
 class FileManager:
     def __init__(self):
         self.media_dir = MEDIA_DIR
-        self.supported_audio = ['.mp3', '.flac', '.wav', '.m4a', '.aac']
-        self.supported_video = ['.mp4', '.mkv', '.avi', '.webm', '.mov']
+        ensure_media_dirs()
+        self.supported_audio = AUDIO_EXTENSIONS
+        self.supported_video = VIDEO_EXTENSIONS
+        
+        # Scans update the persisted media_files rows; one at a time
+        self._scan_lock = threading.Lock()
     
     def scan_media_directory(self) -> Dict:
         """Scan the entire media directory and return file organization status"""
@@ -26,92 +164,97 @@ class FileManager:
         }
         
         try:
-            for playlist_key, playlist_name in PLAYLISTS.items():
-                playlist_dir = self.media_dir / playlist_key
-                
-                if not playlist_dir.exists():
-                    continue
-                
-                playlist_data = {
-                    'name': playlist_name,
-                    'mp3_files': [],
-                    'flac_files': [],
-                    'video_files': [],
-                    'mp3_count': 0,
-                    'flac_count': 0,
-                    'video_count': 0,
-                    'is_balanced': False
-                }
-                
-                # Scan each format directory
-                for format_type in ['mp3', 'flac', 'video']:
-                    format_dir = playlist_dir / format_type
-                    if format_dir.exists():
-                        if format_type in ['mp3', 'flac']:
-                            files = [f for f in format_dir.iterdir() 
-                                   if f.is_file() and f.suffix.lower() in self.supported_audio]
-                        else:
-                            files = [f for f in format_dir.iterdir() 
-                                   if f.is_file() and f.suffix.lower() in self.supported_video]
-                        
-                        playlist_data[f'{format_type}_files'] = [
-                            {
-                                'name': f.name,
-                                'path': str(f),
-                                'size': f.stat().st_size,
-                                'metadata': self._extract_metadata(f)
-                            } for f in files
-                        ]
-                        playlist_data[f'{format_type}_count'] = len(files)
-                        result['total_files'] += len(files)
-                
-                # Check if balanced
-                playlist_data['is_balanced'] = (
-                    playlist_data['mp3_count'] == playlist_data['flac_count'] == playlist_data['video_count']
-                )
-                
-                result['playlists'][playlist_key] = playlist_data
+            with self._scan_lock, SessionLocal() as db, db.begin():
+                for playlist_key, playlist_name in PLAYLISTS.items():
+                    playlist_dir = self.media_dir / playlist_key
+                    
+                    if not playlist_dir.exists():
+                        continue
+                    
+                    playlist_data = {
+                        'name': playlist_name,
+                        'mp3_files': [],
+                        'flac_files': [],
+                        'video_files': [],
+                        'mp3_count': 0,
+                        'flac_count': 0,
+                        'video_count': 0,
+                        'is_balanced': False
+                    }
+                    
+                    # Scan each format directory
+                    for format_type in ['mp3', 'flac', 'video']:
+                        file_infos = self._scan_folder(db, playlist_dir / format_type, self._extensions_for(format_type))
+                        playlist_data[f'{format_type}_files'] = file_infos
+                        playlist_data[f'{format_type}_count'] = len(file_infos)
+                        result['total_files'] += len(file_infos)
+                    
+                    # Check if balanced
+                    playlist_data['is_balanced'] = (
+                        playlist_data['mp3_count'] == playlist_data['flac_count'] == playlist_data['video_count']
+                    )
+                    
+                    result['playlists'][playlist_key] = playlist_data
             
             return result
             
         except Exception as e:
-            logger.error(f"Failed to scan media directory: {e}")
+            logger.error("Failed to scan media directory: %s", e)
             return result
     
+    def _extensions_for(self, format_type: str) -> FrozenSet[str]:
+        return self.supported_video if format_type == 'video' else self.supported_audio
+    
+    def _scan_folder(self, db: Session, folder: Path, extensions: FrozenSet[str]) -> List[Dict]:
+        """List a format folder, re-reading tags only for new or changed files"""
+        folder_key = str(folder)
+        known = {
+            row.path: row
+            for row in db.scalars(select(MediaFile).where(MediaFile.folder == folder_key))
+        }
+        
+        rows = []
+        stale = []
+        for entry in _list_files(folder, extensions):
+            stat = entry.stat()
+            row = known.pop(entry.path, None)
+            if row is None:
+                row = MediaFile(path=entry.path, folder=folder_key)
+                db.add(row)
+            if row.size != stat.st_size or row.mtime_ns != stat.st_mtime_ns:
+                row.size = stat.st_size
+                row.mtime_ns = stat.st_mtime_ns
+                stale.append(row)
+            rows.append((entry, row))
+        
+        # Only new or modified files have their tags read
+        stale_metadata = _metadata_executor.map(self._extract_metadata, [Path(row.path) for row in stale])
+        for row, metadata in zip(stale, stale_metadata):
+            for field in _METADATA_FIELDS:
+                setattr(row, field, metadata[field])
+        
+        # Anything not seen on disk was deleted or renamed
+        for row in known.values():
+            db.delete(row)
+        
+        return [
+            {
+                'name': entry.name,
+                'path': entry.path,
+                'size': row.size,
+                'metadata': {field: getattr(row, field) for field in _METADATA_FIELDS}
+            } for entry, row in rows
+        ]
+    
     def _extract_metadata(self, file_path: Path) -> Dict:
         """Extract metadata from audio/video file"""
         try:
-            if file_path.suffix.lower() == '.mp3':
-                audio = MP3(file_path)
-                return {
-                    'title': str(audio.get('TIT2', ['Unknown'])[0]) if audio.get('TIT2') else 'Unknown',
-                    'artist': str(audio.get('TPE1', ['Unknown'])[0]) if audio.get('TPE1') else 'Unknown',
-                    'album': str(audio.get('TALB', ['Unknown'])[0]) if audio.get('TALB') else 'Unknown',
-                    'duration': getattr(audio.info, 'length', 0),
-                    'bitrate': getattr(audio.info, 'bitrate', 0),
-                    'format': 'MP3'
-                }
-            elif file_path.suffix.lower() == '.flac':
-                audio = FLAC(file_path)
-                return {
-                    'title': audio.get('TITLE', ['Unknown'])[0] if audio.get('TITLE') else 'Unknown',
-                    'artist': audio.get('ARTIST', ['Unknown'])[0] if audio.get('ARTIST') else 'Unknown',
-                    'album': audio.get('ALBUM', ['Unknown'])[0] if audio.get('ALBUM') else 'Unknown',
-                    'duration': getattr(audio.info, 'length', 0),
-                    'bitrate': getattr(audio.info, 'bitrate', 0),
-                    'format': 'FLAC'
-                }
-        except Exception as e:
-            logger.error(f"Failed to extract metadata from {file_path}: {e}")
+            mtime_ns = file_path.stat().st_mtime_ns
+        except OSError:
+            return _read_metadata(file_path)
         
-        return {
-            'title': file_path.stem,
-            'artist': 'Unknown',
-            'album': 'Unknown',
-            'duration': 0,
-            'bitrate': 0,
-            'format': file_path.suffix.upper()[1:]  # Remove the dot
-        }
+        # Copy so callers never modify the cached entry
+        return dict(_read_metadata_cached(str(file_path), mtime_ns))
     
     def copy_files_to_media_directory(self, source_paths: List[str], target_playlist: str) -> Dict:
         """Copy files from external locations to media directory"""
@@ -153,7 +296,7 @@ class FileManager:
                     })
                     continue
                 
-                target_dir.mkdir(parents=True, exist_ok=True)
+                ensure_dir(target_dir)
                 target_path = target_dir / source.name
                 
                 # Check for duplicates
@@ -165,7 +308,7 @@ class FileManager:
                     continue
                 
                 try:
-                    shutil.copy2(source, target_path)
+                    _copy_file(source, target_path)
                     result['success'].append({
                         'file': str(source),
                         'target': str(target_path),
@@ -180,7 +323,7 @@ class FileManager:
             return result
             
         except Exception as e:
-            logger.error(f"Failed to copy files: {e}")
+            logger.error("Failed to copy files: %s", e)
             result['failed'].append({
                 'error': f"General error: {str(e)}"
             })
@@ -202,17 +345,15 @@ class FileManager:
             all_songs = {}
             
             for format_type in ['mp3', 'flac', 'video']:
-                format_dir = playlist_dir / format_type
-                if format_dir.exists():
-                    for file in format_dir.iterdir():
-                        if file.is_file():
-                            normalized_name = self._normalize_filename(file.stem)
-                            if normalized_name not in all_songs:
-                                all_songs[normalized_name] = {
-                                    'original_name': file.stem,
-                                    'formats': {}
-                                }
-                            all_songs[normalized_name]['formats'][format_type] = str(file)
+                for entry in _list_files(playlist_dir / format_type):
+                    stem = os.path.splitext(entry.name)[0]
+                    normalized_name = self._normalize_filename(stem)
+                    if normalized_name not in all_songs:
+                        all_songs[normalized_name] = {
+                            'original_name': stem,
+                            'formats': {}
+                        }
+                    all_songs[normalized_name]['formats'][format_type] = entry.path
             
             # Check which formats are missing for each song
             for song_name, song_data in all_songs.items():
@@ -231,20 +372,15 @@ class FileManager:
             return result
             
         except Exception as e:
-            logger.error(f"Failed to find missing formats: {e}")
+            logger.error("Failed to find missing formats: %s", e)
             return result
     
     def _normalize_filename(self, filename: str) -> str:
         """Normalize filename for comparison"""
-        # Remove common variations and normalize
-        normalized = filename.lower()
-        normalized = re.sub(r'[^\w\s]', '', normalized)  # Remove special characters
-        normalized = re.sub(r'\s+', ' ', normalized)     # Normalize spaces
-        normalized = normalized.strip()
-        return normalized
+        return _normalize(filename)
     
-    def match_with_spotify_tracks(self, playlist_key: str, spotify_tracks: List[Dict]) -> Dict:
-        """Match local files with Spotify tracks"""
+    def match_with_spotify_tracks(self, playlist_key: str, spotify_tracks: List) -> Dict:
+        """Match local files with Spotify tracks (SpotifyManager Track objects)"""
         result = {
             'matched': [],
             'local_only': [],
@@ -253,69 +389,75 @@ class FileManager:
         }
         
         try:
-            # Get local files
-            scan_result = self.scan_media_directory()
-            if playlist_key not in scan_result['playlists']:
+            # Get local songs for this playlist only, without rescanning the
+            # whole library on every match request
+            local_songs = self._list_song_identifiers(playlist_key)
+            if local_songs is None:
                 return result
             
-            local_playlist = scan_result['playlists'][playlist_key]
-            
-            # Create list of all local songs
-            local_songs = set()
-            for format_type in ['mp3_files', 'flac_files', 'video_files']:
-                for file_info in local_playlist[format_type]:
-                    # Use metadata title if available, otherwise filename
-                    title = file_info.get('metadata', {}).get('title', file_info['name'])
-                    artist = file_info.get('metadata', {}).get('artist', 'Unknown')
-                    local_songs.add(self._normalize_track_name(title, artist))
-            
-            # Create list of Spotify songs
-            spotify_songs = set()
-            spotify_lookup = {}
-            for track in spotify_tracks:
-                track_name = self._normalize_track_name(
-                    track['name'], 
-                    ', '.join(track['artists'])
-                )
-                spotify_songs.add(track_name)
-                spotify_lookup[track_name] = track
+            # Normalize each Spotify track once; the dict drops duplicates
+            # while keeping the playlist order
+            spotify_songs = dict.fromkeys(
+                self._normalize_track_name(track.name, ', '.join(track.artists))
+                for track in spotify_tracks
+            )
             
-            # Find matches and differences
-            matched_songs = local_songs.intersection(spotify_songs)
-            local_only_songs = local_songs - spotify_songs
-            spotify_only_songs = spotify_songs - local_songs
+            # Find matches and differences with hash lookups
+            matched_songs = [name for name in spotify_songs if name in local_songs]
+            spotify_only_songs = [name for name in spotify_songs if name not in local_songs]
+            local_only_songs = [name for name in local_songs if name not in spotify_songs]
             
             # Prepare results
-            result['matched'] = list(matched_songs)
-            result['local_only'] = list(local_only_songs)
-            result['spotify_only'] = list(spotify_only_songs)
+            result['matched'] = matched_songs
+            result['local_only'] = local_only_songs
+            result['spotify_only'] = spotify_only_songs
             
-            # Add fuzzy matching for close matches
-            for local_song in local_only_songs:
-                best_match = None
-                best_ratio = 0
-                
-                for spotify_song in spotify_only_songs:
-                    ratio = SequenceMatcher(None, local_song, spotify_song).ratio()
-                    if ratio > best_ratio and ratio > 0.8:  # 80% similarity threshold
-                        best_ratio = ratio
-                        best_match = spotify_song
+            # Add fuzzy matching for close matches: score every local/Spotify
+            # pair in one native call, entries below the cutoff come back as 0
+            if local_only_songs and spotify_only_songs:
+                scores = process.cdist(
+                    local_only_songs,
+                    spotify_only_songs,
+                    scorer=fuzz.ratio,
+                    score_cutoff=80,
+                    workers=-1
+                )
+                best_indices = scores.argmax(axis=1)
                 
-                if best_match:
-                    result['match_confidence'][local_song] = {
-                        'spotify_match': best_match,
-                        'confidence': best_ratio
-                    }
+                for row, local_song in enumerate(local_only_songs):
+                    best_index = best_indices[row]
+                    best_score = scores[row, best_index]
+                    # Strictly above 80% similarity; the cutoff keeps a score of exactly 80
+                    if best_score > 80:
+                        result['match_confidence'][local_song] = {
+                            'spotify_match': spotify_only_songs[best_index],
+                            'confidence': round(float(best_score) / 100, 4)
+                        }
             
             return result
             
         except Exception as e:
-            logger.error(f"Failed to match with Spotify tracks: {e}")
+            logger.error("Failed to match with Spotify tracks: %s", e)
             return result
     
+    def _list_song_identifiers(self, playlist_key: str) -> Optional[FrozenSet[str]]:
+        """Normalized "title - artist" names of a playlist's local files"""
+        playlist_dir = self.media_dir / playlist_key
+        if playlist_key not in PLAYLISTS or not playlist_dir.is_dir():
+            return None
+        
+        # A folder's mtime changes whenever files are added, removed or
+        # renamed in it; retagging a file in place only changes the file's
+        # own mtime, so the newest file mtime is part of the key as well
+        format_dirs = [playlist_dir / format_type for format_type in _FORMAT_EXTENSIONS]
+        file_mtimes = [
+            entry.stat().st_mtime_ns
+            for format_dir in format_dirs
+            for entry in _list_files(format_dir)
+        ]
+        mtimes = tuple(_dir_mtime_ns(format_dir) for format_dir in format_dirs) + (max(file_mtimes, default=0),)
+        return _song_identifiers(str(playlist_dir), mtimes)
+    
     def _normalize_track_name(self, title: str, artist: str) -> str:
         """Normalize track name for matching"""
-        normalized = f"{title} - {artist}".lower()
-        normalized = re.sub(r'[^\w\s]', '', normalized)
-        normalized = re.sub(r'\s+', ' ', normalized)
-        return normalized.strip()
\ No newline at end of file
+        return _normalize(f"{title} - {artist}")
\ No newline at end of file
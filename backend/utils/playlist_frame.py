@@ -0,0 +1,50 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+class PlaylistFrame:
+    """Column-wise copy of a playlist's tracks, so aggregates run as NumPy loops"""
+    
+    def __init__(self, ids: np.ndarray, names: np.ndarray, durations_ms: np.ndarray,
+                 artists: np.ndarray, artist_offsets: np.ndarray):
+        self.ids = ids
+        self.names = names
+        self.durations_ms = durations_ms
+        # Artists of track i are artists[artist_offsets[i]:artist_offsets[i + 1]]
+        self.artists = artists
+        self.artist_offsets = artist_offsets
+    
+    @classmethod
+    def from_tracks(cls, tracks: Sequence) -> "PlaylistFrame":
+        """Build the columns from SpotifyManager Track objects"""
+        count = len(tracks)
+        artist_counts = np.fromiter((len(track.artists) for track in tracks), dtype=np.int64, count=count)
+        return cls(
+            # Local files added to a playlist have no Spotify id
+            ids=np.array([track.id or '' for track in tracks], dtype=str),
+            names=np.array([track.name for track in tracks], dtype=str),
+            durations_ms=np.fromiter((track.duration_ms for track in tracks), dtype=np.int64, count=count),
+            artists=np.array([artist for track in tracks for artist in track.artists], dtype=str),
+            artist_offsets=np.concatenate(([0], np.cumsum(artist_counts)))
+        )
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @property
+    def total_duration_ms(self) -> int:
+        return int(self.durations_ms.sum())
+    
+    def unique_ids(self) -> List[str]:
+        """Distinct Spotify ids, sorted"""
+        ids = np.unique(self.ids)
+        return ids[ids != ''].tolist()
+    
+    def unique_artists(self) -> List[str]:
+        """Distinct artist names, sorted"""
+        return np.unique(self.artists).tolist()
+    
+    def artist_counts(self) -> Dict[str, int]:
+        """Number of tracks each artist appears on"""
+        names, counts = np.unique(self.artists, return_counts=True)
+        return dict(zip(names.tolist(), counts.tolist()))
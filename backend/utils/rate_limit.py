@@ -0,0 +1,38 @@
+from collections import deque
+from typing import Deque
+import threading
+import time
+
+class LeakyBucket:
+    """Lets at most `rate` calls start per `period` seconds, `concurrency` at a time"""
+    
+    def __init__(self, rate: int = 10, period: float = 1.0, concurrency: int = 4):
+        self.rate = rate
+        self.period = period
+        self._starts: Deque[float] = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(concurrency)
+    
+    def __enter__(self):
+        self._slots.acquire()
+        try:
+            self._wait_for_turn()
+        except BaseException:
+            self._slots.release()
+            raise
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._slots.release()
+    
+    def _wait_for_turn(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._starts and now - self._starts[0] >= self.period:
+                    self._starts.popleft()
+                if len(self._starts) < self.rate:
+                    self._starts.append(now)
+                    return
+                delay = self.period - (now - self._starts[0])
+            time.sleep(delay)
@@ -0,0 +1,28 @@
+"""Errors raised by SpotifyManager.
+
+Kept free of spotipy imports so the API layer can map them to HTTP
+responses without loading the SDK.
+"""
+from typing import Optional
+
+class SpotifyError(Exception):
+    """Base class for Spotify manager errors"""
+
+class SpotifyNotConfigured(SpotifyError):
+    def __init__(self):
+        super().__init__("Spotify not configured. Please set valid SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in your environment variables.")
+
+class SpotifyAuthRequired(SpotifyError):
+    def __init__(self, message: str = "Not authenticated with Spotify. Please complete the authentication flow first."):
+        super().__init__(message)
+
+class SpotifyRateLimited(SpotifyError):
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__("Spotify rate limit exceeded. Please try again later.")
+        self.retry_after = retry_after
+
+class SpotifyUnavailable(SpotifyError):
+    """Spotify could not be reached or answered with a server error; worth retrying later"""
+
+class SpotifyRequestFailed(SpotifyError):
+    """A Spotify API call failed for a reason other than auth or rate limiting"""
@@ -1,38 +1,315 @@
-import os
+import requests
 import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-from typing import List, Dict, Optional
+from requests.adapters import HTTPAdapter
+from spotipy.cache_handler import CacheHandler
+from spotipy.oauth2 import SpotifyOAuth, SpotifyOauthError
+from urllib3.util.retry import Retry
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import partial, wraps
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Iterator, List, Dict, Optional, Set, Tuple
+import inspect
 import logging
-import json
+import os
+import threading
+import operator
+import orjson
+import time
 from pathlib import Path
+from cache import ResponseCache
+from config import SEARCH_CACHE_TTL, SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET, SPOTIFY_REDIRECT_URI
+from .rate_limit import LeakyBucket
+from .spotify_errors import (
+    SpotifyAuthRequired,
+    SpotifyError,
+    SpotifyNotConfigured,
+    SpotifyRateLimited,
+    SpotifyRequestFailed,
+    SpotifyUnavailable,
+)
 
 logger = logging.getLogger(__name__)
 
+# Runs independent requests concurrently: the remaining pages of a listing
+# once the first reveals the total, and the lookups of a bulk search
+_EXECUTOR_WORKERS = 8
+_executor = ThreadPoolExecutor(max_workers=_EXECUTOR_WORKERS, thread_name_prefix="spotify")
+
+# Every request to Spotify, from any client, goes through this bucket so
+# bursts (bulk searches, concurrent page fetches) stay under the rate limit
+_bucket = LeakyBucket(rate=10, period=1.0, concurrency=4)
+
+# Normalized search_track results; playlist building repeats the same lookups
+_search_cache = ResponseCache("spotify-search", ttl=SEARCH_CACHE_TTL, maxsize=10000)
+
+if TYPE_CHECKING:
+    # NumPy is only loaded when a caller asks for the array form
+    from .playlist_frame import PlaylistFrame
+
+@dataclass(frozen=True)
+class Track:
+    """A Spotify track reduced to the fields the API returns"""
+    __slots__ = ('id', 'name', 'artists', 'album', 'duration_ms', 'preview_url', 'external_urls')
+    id: str
+    name: str
+    artists: Tuple[str, ...]
+    album: str
+    duration_ms: int
+    preview_url: Optional[str]
+    external_urls: Dict[str, str]
+
+_track_fields = operator.itemgetter('id', 'name', 'artists', 'album', 'duration_ms', 'preview_url', 'external_urls')
+_name = operator.itemgetter('name')
+
+def _to_track(track: Dict) -> Track:
+    """Project a Spotify track object onto a Track"""
+    track_id, name, artists, album, duration_ms, preview_url, external_urls = _track_fields(track)
+    return Track(track_id, name, tuple(map(_name, artists)), album['name'], duration_ms, preview_url, external_urls)
+
+# Only what get_playlist_tracks keeps, plus the paging total
+_PLAYLIST_TRACK_FIELDS = 'items(track(id,name,artists(name),album(name),duration_ms,preview_url,external_urls)),total'
+_PLAYLIST_TRACK_ID_FIELDS = 'items(track(id)),total'
+_PLAYLIST_DETAIL_FIELDS = 'images,followers(total)'
+
+# Treat tokens this close to expiry as expired so calls never race it; the
+# same window spotipy's is_token_expired uses, applied to expires_at directly
+TOKEN_EXPIRY_MARGIN = 60
+
+# The background refresher renews tokens this long before they expire, well
+# ahead of TOKEN_EXPIRY_MARGIN, so requests don't wait on a refresh; failed
+# refreshes are retried after TOKEN_REFRESH_RETRY
+TOKEN_REFRESH_AHEAD = 300
+TOKEN_REFRESH_RETRY = 30
+
+# The manager whose token the current request has already verified; set by
+# the API's auth dependency so the guarded methods it calls skip the check
+_request_authenticated = ContextVar("spotify_request_authenticated", default=None)
+
+RATE_LIMIT_RETRIES = 5
+RATE_LIMIT_MAX_WAIT = 60
+
+class _TokenCache(CacheHandler):
+    """Token kept in memory; the token file is read once and written behind"""
+    
+    def __init__(self, path: Path):
+        self._path = path
+        # The id of the token's user is stored in the same file, so a restart
+        # doesn't have to look it up again
+        self._token_info = self._read()
+        self.user_id: Optional[str] = self._token_info.pop('user_id', None) if self._token_info else None
+        # One writer thread keeps saves and deletes in order
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="spotify-token")
+    
+    def get_cached_token(self) -> Optional[Dict]:
+        return self._token_info
+    
+    def save_token_to_cache(self, token_info: Dict):
+        self._token_info = token_info
+        self._persist()
+    
+    def set_user_id(self, user_id: str):
+        self.user_id = user_id
+        if self._token_info:
+            self._persist()
+    
+    def clear(self):
+        self._token_info = None
+        self.user_id = None
+        self._writer.submit(self._path.unlink, missing_ok=True)
+    
+    def flush(self):
+        """Wait for pending writes"""
+        self._writer.shutdown(wait=True)
+    
+    def _persist(self):
+        data = dict(self._token_info, user_id=self.user_id) if self.user_id else self._token_info
+        self._writer.submit(self._write, data)
+    
+    def _read(self) -> Optional[Dict]:
+        try:
+            return orjson.loads(self._path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.warning("Couldn't read Spotify token file %s: %s", self._path, e)
+            return None
+    
+    def _write(self, data: Dict):
+        # Written aside and renamed over the old file, so a crash mid-write
+        # never leaves a torn token behind
+        tmp_path = self._path.with_name(self._path.name + '.tmp')
+        try:
+            tmp_path.write_bytes(orjson.dumps(data))
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning("Couldn't write Spotify token file %s: %s", self._path, e)
+
+class _OrjsonResponse(requests.Response):
+    def json(self, **kwargs):
+        # Playlist pages run to hundreds of KB; orjson parses them several
+        # times faster than the stdlib decoder requests uses
+        return orjson.loads(self.content)
+
+class _SpotifyAdapter(HTTPAdapter):
+    """Rate limits every request and decodes responses with orjson"""
+    
+    def send(self, request, **kwargs):
+        with _bucket:
+            return super().send(request, **kwargs)
+    
+    def build_response(self, req, resp):
+        response = super().build_response(req, resp)
+        response.__class__ = _OrjsonResponse
+        return response
+
+class _SpotifyOAuth(SpotifyOAuth):
+    """SpotifyOAuth that encodes the client credentials header once"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # spotipy base64-encodes client_id:client_secret on every token
+        # request; the credentials are fixed for the manager's lifetime.
+        # requests merges these into its own header dict, never mutating it
+        self._auth_headers = super()._make_authorization_headers()
+    
+    def _make_authorization_headers(self):
+        return self._auth_headers
+
+def _build_session() -> requests.Session:
+    """HTTP session shared by the OAuth helper and every API client"""
+    session = requests.Session()
+    # Transient server errors are retried here, for idempotent methods only
+    # (urllib3's default set): a retried POST could create a playlist or add
+    # tracks twice. 429s are left to _call, which caps how long a
+    # Retry-After may stall a request. Once retries run out the last 5xx
+    # response is returned rather than a RetryError, which spotipy would
+    # report as a 429
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503),
+        raise_on_status=False
+    )
+    adapter = _SpotifyAdapter(pool_connections=20, pool_maxsize=20, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def require_auth(fn: Callable) -> Callable:
+    """Guard a SpotifyManager method behind configuration and a valid token"""
+    @wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        if not self.configured:
+            raise SpotifyNotConfigured()
+        # is_authenticated() returns straight away when this request already
+        # verified the token or _token_valid() holds, and only otherwise
+        # reloads or refreshes it. A token that lapses mid-request is still
+        # caught by _request's 401 retry
+        if not self.is_authenticated():
+            raise SpotifyAuthRequired()
+        return fn(self, *args, **kwargs)
+    return wrapper
+
+def _api_errors(message: str) -> Callable:
+    """Re-raise any failure of a SpotifyManager method as the matching SpotifyError"""
+    def decorate(fn: Callable) -> Callable:
+        if inspect.isgeneratorfunction(fn):
+            # Failures surface while the caller iterates, not at the call
+            @wraps(fn)
+            def wrapper(self, *args, **kwargs):
+                try:
+                    yield from fn(self, *args, **kwargs)
+                except Exception as e:
+                    raise self._api_error(e, message)
+        else:
+            @wraps(fn)
+            def wrapper(self, *args, **kwargs):
+                try:
+                    return fn(self, *args, **kwargs)
+                except Exception as e:
+                    raise self._api_error(e, message)
+        return wrapper
+    return decorate
+
+def _call(fn: Callable, *args, **kwargs):
+    """Call a spotipy method, backing off and retrying when rate limited"""
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        try:
+            return fn(*args, **kwargs)
+        except spotipy.SpotifyException as e:
+            if e.http_status != 429:
+                raise
+            if e.headers is None:
+                # spotipy's stand-in for exhausted transport retries, not
+                # an actual rate limit response
+                raise SpotifyUnavailable(f"Spotify is unavailable: {e}") from e
+            retry_after = (e.headers or {}).get('Retry-After')
+            try:
+                wait = float(retry_after)
+            except (TypeError, ValueError):
+                wait = 2 ** attempt
+            if attempt == RATE_LIMIT_RETRIES:
+                raise SpotifyRateLimited(wait) from e
+            wait = min(RATE_LIMIT_MAX_WAIT, wait)
+            logger.warning("Spotify rate limit hit, retrying in %ss", wait)
+            time.sleep(wait)
+
 class SpotifyManager:
     def __init__(self):
-        self.client_id = os.getenv("SPOTIFY_CLIENT_ID")
-        self.client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
-        self.redirect_uri = os.getenv("SPOTIFY_REDIRECT_URI", "http://localhost:8000/auth/spotify/callback")
+        self.client_id = SPOTIFY_CLIENT_ID
+        self.client_secret = SPOTIFY_CLIENT_SECRET
+        self.redirect_uri = SPOTIFY_REDIRECT_URI
+        
+        # Credential checks never change after startup
+        self.client_id_set = bool(self.client_id and self.client_id not in ["your_spotify_client_id_here", ""])
+        self.client_secret_set = bool(self.client_secret and self.client_secret not in ["your_spotify_client_secret_here", ""])
         
         self.scope = "user-library-read playlist-modify-public playlist-modify-private user-read-private playlist-read-private"
         
         # Token storage path
         self.token_file = Path("./spotify_token.json")
+        self._token_cache = _TokenCache(self.token_file)
+        
+        # Keep-alive connections survive token refreshes, which rebuild self.sp
+        self._session = _build_session()
         
         # Only initialize OAuth if credentials are available
         self.sp_oauth = None
+        self._auth_url: Optional[str] = None
         self.sp = None
         self.configured = False
         
+        # Set with the client: expiry of its token
+        self._token_expires_at = 0
+        
+        # The manager is shared by every request thread; token loads,
+        # refreshes and resets happen under this lock
+        self._lock = threading.RLock()
+        # Set while a token reload/refresh runs; concurrent callers wait on it
+        # instead of each asking Spotify for a new token
+        self._refresh_inflight: Optional[Future] = None
+        
+        # Started with the first token; woken whenever the token changes
+        self._refresher: Optional[threading.Thread] = None
+        self._token_changed = threading.Event()
+        self._closing = threading.Event()
+        
         if self.client_id and self.client_secret and self.client_id not in ["demo_client_id", "your_spotify_client_id_here"]:
             try:
-                self.sp_oauth = SpotifyOAuth(
+                self.sp_oauth = _SpotifyOAuth(
                     client_id=self.client_id,
                     client_secret=self.client_secret,
                     redirect_uri=self.redirect_uri,
                     scope=self.scope,
-                    cache_path=str(self.token_file)
+                    cache_handler=self._token_cache,
+                    requests_session=self._session
                 )
+                # Built from the client id, redirect URI and scope only, none
+                # of which change at runtime
+                self._auth_url = self.sp_oauth.get_authorize_url()
                 self.configured = True
                 
                 # Try to load existing token
@@ -40,70 +317,220 @@ class SpotifyManager:
                 
                 logger.info("Spotify manager initialized with valid credentials")
             except Exception as e:
-                logger.error(f"Failed to initialize Spotify OAuth: {e}")
+                logger.error("Failed to initialize Spotify OAuth: %s", e)
                 self.configured = False
         else:
             logger.warning("Spotify credentials not found or placeholder values detected. Please set valid SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET")
     
     def _load_token(self):
-        """Load existing token if available and valid"""
-        try:
-            if self.token_file.exists():
-                token_info = self.sp_oauth.get_cached_token()
-                if token_info:
-                    self.sp = spotipy.Spotify(auth=token_info['access_token'])
-                    logger.info("Loaded existing Spotify token")
-                    return True
-        except Exception as e:
-            logger.error(f"Failed to load existing token: {e}")
+        """Check for a stored token; the API client is built on first use"""
+        if self._token_cache.get_cached_token():
+            logger.info("Loaded existing Spotify token")
+            return True
         return False
     
+    def _set_token(self, token_info: Dict):
+        """Point the API client at a fresh token"""
+        with self._lock:
+            # Updated in place so calls bound to the client pick up the new token
+            if self.sp:
+                self.sp.set_auth(token_info['access_token'])
+            else:
+                self.sp = self._client(token_info['access_token'])
+            self._token_expires_at = token_info.get('expires_at', 0)
+            self._token_changed.set()
+            if self._refresher is None and not self._closing.is_set():
+                self._refresher = threading.Thread(
+                    target=self._refresh_loop, name="spotify-token-refresh", daemon=True
+                )
+                self._refresher.start()
+    
+    def _drop_token(self):
+        """Forget the client and the stored token so the user must log in again"""
+        with self._lock:
+            self.sp = None
+            self._token_cache.clear()
+            self._token_changed.set()
+    
+    def _refresh_loop(self):
+        """Refresh the token shortly before it expires, off the request path"""
+        while not self._closing.is_set():
+            expires_at = self._token_expires_at
+            if self.sp is None or not expires_at:
+                # Logged out; wait for the next login
+                delay = None
+            else:
+                delay = expires_at - TOKEN_REFRESH_AHEAD - time.time()
+                if delay <= 0:
+                    # Shares the in-flight refresh with any request that
+                    # raced us there
+                    if self._restore_shared(rejected_expires_at=expires_at):
+                        continue
+                    delay = TOKEN_REFRESH_RETRY
+            # A new token, a logout or close() cuts the wait short
+            self._token_changed.wait(delay)
+            self._token_changed.clear()
+    
+    def _current_user_id(self) -> str:
+        """Id of the authenticated user, looked up once per login"""
+        user_id = self._token_cache.user_id
+        if user_id is None:
+            user_id = self._request(self.sp.current_user)['id']
+            self._token_cache.set_user_id(user_id)
+        return user_id
+    
     def is_authenticated(self) -> bool:
         """Check if currently authenticated with Spotify"""
         if not self.configured:
             return False
         
+        # A client whose token is still valid needs no round trip
+        if self._verified_for_request() or self._token_valid():
+            return True
+        return self._restore_shared()
+    
+    def mark_request_authenticated(self):
+        """Record that the current request has verified the token"""
+        # Only visible to code running in the caller's context or a copy of
+        # it, so this is called from the request's async dependency rather
+        # than a worker thread
+        _request_authenticated.set(self)
+    
+    def _verified_for_request(self) -> bool:
+        # self.sp is cleared on logout or a revoked refresh, which the
+        # request's earlier check can't have seen
+        return _request_authenticated.get() is self and self.sp is not None
+    
+    def _restore_shared(self, rejected_expires_at: Optional[float] = None) -> bool:
+        """Run _restore_token once for all concurrent callers"""
+        with self._lock:
+            if rejected_expires_at is None:
+                # Another thread may have refreshed while this one waited
+                if self._token_valid():
+                    return True
+            elif self._token_expires_at != rejected_expires_at:
+                # Spotify answered 401 to a token that another thread has
+                # already replaced; otherwise it is refreshed despite its expiry
+                return self.sp is not None
+            refresh = self._refresh_inflight
+            if refresh is None:
+                refresh = self._refresh_inflight = Future()
+                owner = True
+            else:
+                owner = False
+        
+        if not owner:
+            return refresh.result()
+        
+        authenticated = False
+        try:
+            authenticated = self._restore_token(force=rejected_expires_at is not None)
+        finally:
+            with self._lock:
+                self._refresh_inflight = None
+            refresh.set_result(authenticated)
+        return authenticated
+    
+    def _restore_token(self, force: bool = False) -> bool:
+        """Rebuild the client from the cached token, refreshing it if expired"""
         try:
             # Check if we have a valid token
-            if self.sp_oauth:
-                token_info = self.sp_oauth.get_cached_token()
-                if not token_info:
-                    return False
-                
-                # Check if token is expired
-                if self.sp_oauth.is_token_expired(token_info):
-                    # Try to refresh the token
-                    try:
-                        token_info = self.sp_oauth.refresh_access_token(token_info['refresh_token'])
-                        if token_info:
-                            self.sp = spotipy.Spotify(auth=token_info['access_token'])
-                        else:
-                            return False
-                    except Exception as e:
-                        logger.debug(f"Token refresh failed: {e}")
+            token_info = self._token_cache.get_cached_token()
+            if not token_info:
+                return False
+            
+            # Check if token is expired
+            if force or time.time() >= token_info.get('expires_at', 0) - TOKEN_EXPIRY_MARGIN:
+                # Try to refresh the token
+                try:
+                    token_info = self.sp_oauth.refresh_access_token(token_info['refresh_token'])
+                    if not token_info:
                         return False
-                
-                # Test the actual connection with the token
-                if self.sp:
-                    try:
-                        user = self.sp.current_user()
-                        if user and user.get('id'):
-                            return True
-                    except Exception as e:
-                        logger.debug(f"Authentication test failed: {e}")
-                        self.sp = None
-                        
+                except SpotifyOauthError as e:
+                    if e.error == 'invalid_grant':
+                        # The refresh token was revoked; only a new login helps
+                        logger.warning("Spotify refresh token rejected: %s", e.error_description)
+                        self._drop_token()
+                    else:
+                        logger.debug("Token refresh failed: %s", e)
+                    return False
+                except Exception as e:
+                    logger.debug("Token refresh failed: %s", e)
+                    return False
+            
+            self._set_token(token_info)
+            return True
         except Exception as e:
-            logger.debug(f"Authentication check failed: {e}")
+            logger.debug("Authentication check failed: %s", e)
             self.sp = None
         
         return False
     
+    def _request(self, fn: Callable, *args, **kwargs):
+        """_call, refreshing the token and retrying once if Spotify rejects it"""
+        expires_at = self._token_expires_at
+        try:
+            return _call(fn, *args, **kwargs)
+        except spotipy.SpotifyException as e:
+            # Tokens can be revoked or rotated before they expire
+            if e.http_status != 401 or not self._restore_shared(rejected_expires_at=expires_at):
+                raise
+            return _call(fn, *args, **kwargs)
+    
+    def _api_error(self, e: Exception, message: str) -> SpotifyError:
+        """Map a failed API call to the SpotifyError raised to callers"""
+        if isinstance(e, SpotifyError):
+            return e
+        
+        logger.error("%s: %s", message, e)
+        # The stored token is only discarded when its refresh is refused
+        # (see _restore_token); outages and server errors must not log the
+        # user out
+        status = e.http_status if isinstance(e, spotipy.SpotifyException) else None
+        if status == 401:
+            return SpotifyAuthRequired("Spotify authentication expired. Please authenticate again.")
+        if (status is not None and status >= 500) or isinstance(e, requests.RequestException):
+            return SpotifyUnavailable(f"{message}: {e}")
+        return SpotifyRequestFailed(f"{message}: {e}")
+    
+    def _token_valid(self) -> bool:
+        return self.sp is not None and time.time() < self._token_expires_at - TOKEN_EXPIRY_MARGIN
+    
+    def _client(self, access_token: str) -> spotipy.Spotify:
+        """API client on the shared session"""
+        return spotipy.Spotify(auth=access_token, requests_session=self._session)
+    
+    def _iter_pages(self, fetch_page: Callable[..., Dict], page_size: int) -> Iterator[Dict]:
+        """Yield every page of a paged Spotify endpoint in order"""
+        first_page = self._request(fetch_page, limit=page_size, offset=0)
+        yield first_page
+        
+        # Keep a bounded window of page requests in flight, so consumers that
+        # stop early don't pay for (or hold) the rest of the listing
+        offsets = iter(range(page_size, first_page['total'], page_size))
+        def submit(offset):
+            return _executor.submit(self._request, fetch_page, limit=page_size, offset=offset)
+        
+        pending = deque(map(submit, islice(offsets, _EXECUTOR_WORKERS)))
+        try:
+            while pending:
+                page = pending.popleft().result()
+                for offset in islice(offsets, 1):
+                    pending.append(submit(offset))
+                yield page
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def _fetch_all_items(self, fetch_page: Callable[..., Dict], page_size: int) -> List[Dict]:
+        """Collect the items of every page of a paged Spotify endpoint"""
+        return [item for page in self._iter_pages(fetch_page, page_size) for item in page['items']]
+    
     def get_auth_url(self) -> str:
         """Get Spotify authorization URL"""
         if not self.configured:
-            raise Exception("Spotify not configured. Please set valid SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in your environment variables.")
-        return self.sp_oauth.get_authorize_url()
+            raise SpotifyNotConfigured()
+        return self._auth_url
     
     def authenticate(self, code: str) -> bool:
         """Authenticate with authorization code"""
@@ -114,180 +541,179 @@ class SpotifyManager:
         try:
             token_info = self.sp_oauth.get_access_token(code)
             if token_info:
-                self.sp = spotipy.Spotify(auth=token_info['access_token'])
+                self._set_token(token_info)
                 # Test the authentication by getting user info
-                user = self.sp.current_user()
+                user = self._request(self.sp.current_user)
                 if user and user.get('id'):
-                    logger.info(f"Spotify authentication successful for user: {user.get('display_name', user.get('id'))}")
+                    self._token_cache.set_user_id(user['id'])
+                    logger.info("Spotify authentication successful for user: %s", user.get('display_name', user.get('id')))
                     return True
                 else:
                     logger.error("Authentication failed - could not get user information")
                     return False
         except Exception as e:
-            logger.error(f"Spotify authentication failed: {e}")
+            logger.error("Spotify authentication failed: %s", e)
         return False
     
-    def search_track(self, query: str, artist: str = None) -> List[Dict]:
+    @require_auth
+    @_api_errors("Spotify search failed")
+    def search_track(self, query: str, artist: str = None) -> List[Track]:
         """Search for tracks on Spotify"""
-        if not self.configured:
-            raise Exception("Spotify not configured. Please set valid SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in your environment variables.")
-            
-        if not self.is_authenticated():
-            raise Exception("Not authenticated with Spotify. Please complete the authentication flow first.")
+        return self._search(query, artist)
+    
+    @require_auth
+    @_api_errors("Spotify search failed")
+    def search_tracks_bulk(self, queries: List[Tuple[str, Optional[str]]]) -> List[List[Track]]:
+        """Search for many (query, artist) pairs at once; results follow the input order"""
+        unique = list(dict.fromkeys(queries))
+        found = dict(zip(unique, _executor.map(lambda pair: self._search(*pair), unique)))
+        return [found[pair] for pair in queries]
+    
+    def _search(self, query: str, artist: Optional[str]) -> List[Track]:
+        """Normalized search results, served from the search cache when possible"""
+        cache_key = _search_cache.key(query, artist)
+        cached = _search_cache.get(cache_key)
+        if cached is not None:
+            return [
+                Track(**dict(track, artists=tuple(track['artists'])))
+                for track in orjson.loads(cached)
+            ]
         
-        search_query = query
-        if artist:
-            search_query = f"track:{query} artist:{artist}"
+        search_query = f"track:{query} artist:{artist}" if artist else query
         
-        try:
-            results = self.sp.search(q=search_query, type='track', limit=10)
-            tracks = []
-            
-            for track in results['tracks']['items']:
-                tracks.append({
-                    'id': track['id'],
-                    'name': track['name'],
-                    'artists': [artist['name'] for artist in track['artists']],
-                    'album': track['album']['name'],
-                    'duration_ms': track['duration_ms'],
-                    'preview_url': track['preview_url'],
-                    'external_urls': track['external_urls']
-                })
-            
-            return tracks
-        except Exception as e:
-            logger.error(f"Spotify search failed: {e}")
-            if "token" in str(e).lower() or "auth" in str(e).lower():
-                # Clear invalid token and require re-authentication
-                self.sp = None
-                if self.token_file.exists():
-                    self.token_file.unlink()
-                raise Exception("Spotify authentication expired. Please authenticate again.")
-            raise Exception(f"Spotify search failed: {str(e)}")
+        results = self._request(self.sp.search, q=search_query, type='track', limit=10)
+        tracks = list(map(_to_track, results['tracks']['items']))
+        
+        _search_cache.set(cache_key, orjson.dumps(tracks))
+        return tracks
     
     def get_authentication_status(self) -> Dict[str, any]:
         """Get detailed authentication status"""
         return {
             "configured": self.configured,
             "authenticated": self.is_authenticated() if self.configured else False,
-            "client_id_set": bool(self.client_id and self.client_id not in ["your_spotify_client_id_here", ""]),
-            "client_secret_set": bool(self.client_secret and self.client_secret not in ["your_spotify_client_secret_here", ""]),
-            "has_cached_token": self.token_file.exists() if self.configured else False
+            "client_id_set": self.client_id_set,
+            "client_secret_set": self.client_secret_set,
+            "has_cached_token": self._token_cache.get_cached_token() is not None if self.configured else False
         }
     
+    @require_auth
+    @_api_errors("Failed to get playlists")
     def get_user_playlists(self) -> List[Dict]:
         """Get user's Spotify playlists"""
-        if not self.configured:
-            raise Exception("Spotify not configured. Please set valid SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in your environment variables.")
-            
-        if not self.is_authenticated():
-            raise Exception("Not authenticated with Spotify. Please complete the authentication flow first.")
-        
-        try:
-            playlists = self.sp.current_user_playlists()
-            return [{
-                'id': playlist['id'],
-                'name': playlist['name'],
-                'description': playlist['description'],
-                'tracks_total': playlist['tracks']['total'],
-                'external_urls': playlist['external_urls'],
-                'owner': playlist['owner']['display_name'] if playlist['owner']['display_name'] else playlist['owner']['id']
-            } for playlist in playlists['items']]
-        except Exception as e:
-            logger.error(f"Failed to get playlists: {e}")
-            if "token" in str(e).lower() or "auth" in str(e).lower():
-                self.sp = None
-                if self.token_file.exists():
-                    self.token_file.unlink()
-                raise Exception("Spotify authentication expired. Please authenticate again.")
-            raise Exception(f"Failed to get playlists: {str(e)}")
+        playlists = self._fetch_all_items(self.sp.current_user_playlists, 50)
+        return [{
+            'id': playlist['id'],
+            'name': playlist['name'],
+            'description': playlist['description'],
+            'tracks_total': playlist['tracks']['total'],
+            'external_urls': playlist['external_urls'],
+            'owner': playlist['owner']['display_name'] if playlist['owner']['display_name'] else playlist['owner']['id']
+        } for playlist in playlists]
     
+    @require_auth
+    @_api_errors("Failed to get playlist details")
+    def get_user_playlists_detailed(self) -> List[Dict]:
+        """Get user's Spotify playlists with their images and follower counts"""
+        playlists = self.get_user_playlists()
+        # One request per playlist; the executor and the rate limiter
+        # decide how many are in flight
+        fetch_details = partial(self._request, self.sp.playlist, fields=_PLAYLIST_DETAIL_FIELDS)
+        details = _executor.map(lambda playlist: fetch_details(playlist['id']), playlists)
+        return [
+            dict(
+                playlist,
+                images=detail.get('images') or [],
+                followers=(detail.get('followers') or {}).get('total')
+            )
+            for playlist, detail in zip(playlists, details)
+        ]
+    
+    @require_auth
+    @_api_errors("Failed to create playlist")
     def create_playlist(self, name: str, description: str = "", public: bool = False) -> Optional[str]:
         """Create a new Spotify playlist"""
-        if not self.configured:
-            raise Exception("Spotify not configured. Please set valid SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in your environment variables.")
-            
-        if not self.is_authenticated():
-            raise Exception("Not authenticated with Spotify. Please complete the authentication flow first.")
-        
-        try:
-            user = self.sp.current_user()
-            playlist = self.sp.user_playlist_create(
-                user['id'], 
-                name, 
-                public=public, 
-                description=description
-            )
-            return playlist['id']
-        except Exception as e:
-            logger.error(f"Failed to create playlist: {e}")
-            if "token" in str(e).lower() or "auth" in str(e).lower():
-                self.sp = None
-                if self.token_file.exists():
-                    self.token_file.unlink()
-                raise Exception("Spotify authentication expired. Please authenticate again.")
-            raise Exception(f"Failed to create playlist: {str(e)}")
-    
-    def add_tracks_to_playlist(self, playlist_id: str, track_ids: List[str]) -> bool:
-        """Add tracks to a Spotify playlist"""
-        if not self.is_authenticated():
-            raise Exception("Not authenticated with Spotify. Please complete the authentication flow first.")
+        playlist = self._request(
+            self.sp.user_playlist_create,
+            self._current_user_id(), 
+            name, 
+            public=public, 
+            description=description
+        )
+        return playlist['id']
+    
+    @require_auth
+    @_api_errors("Failed to add tracks to playlist")
+    def add_tracks_to_playlist(self, playlist_id: str, track_ids: List[str], preserve_order: bool = True) -> bool:
+        """Add tracks to a Spotify playlist; without preserve_order the batches are sent concurrently"""
+        # Drop repeats and tracks the playlist already has; that often
+        # leaves nothing to send
+        existing = self._playlist_track_ids(playlist_id)
+        track_ids = [track_id for track_id in dict.fromkeys(track_ids) if track_id not in existing]
         
-        try:
-            # Spotify API limits to 100 tracks per request
-            for i in range(0, len(track_ids), 100):
-                batch = track_ids[i:i+100]
-                self.sp.playlist_add_items(playlist_id, batch)
-            return True
-        except Exception as e:
-            logger.error(f"Failed to add tracks to playlist: {e}")
-            if "token" in str(e).lower() or "auth" in str(e).lower():
-                self.sp = None
-                if self.token_file.exists():
-                    self.token_file.unlink()
-                raise Exception("Spotify authentication expired. Please authenticate again.")
-            raise Exception(f"Failed to add tracks to playlist: {str(e)}")
-    
-    def get_playlist_tracks(self, playlist_id: str) -> List[Dict]:
+        # Spotify API limits to 100 tracks per request
+        batches = [track_ids[i:i+100] for i in range(0, len(track_ids), 100)]
+        add_batch = partial(self._request, self.sp.playlist_add_items, playlist_id)
+        if preserve_order:
+            # Each request appends, so batches must land one after another
+            for batch in batches:
+                add_batch(batch)
+        else:
+            # list() waits for every batch and re-raises the first failure
+            list(_executor.map(add_batch, batches))
+        return True
+    
+    @require_auth
+    def get_playlist_tracks(self, playlist_id: str) -> List[Track]:
         """Get tracks from a Spotify playlist"""
-        if not self.is_authenticated():
-            raise Exception("Not authenticated with Spotify. Please complete the authentication flow first.")
-        
-        try:
-            results = self.sp.playlist_tracks(playlist_id)
-            tracks = []
-            
-            for item in results['items']:
+        return list(self.iter_playlist_tracks(playlist_id))
+    
+    @require_auth
+    @_api_errors("Failed to get playlist tracks")
+    def iter_playlist_tracks(self, playlist_id: str) -> Iterator[Track]:
+        """Yield the tracks of a Spotify playlist as their pages arrive"""
+        fetch_page = partial(
+            self.sp.playlist_tracks,
+            playlist_id,
+            fields=_PLAYLIST_TRACK_FIELDS,
+            additional_types=('track',)
+        )
+        for page in self._iter_pages(fetch_page, 100):
+            for item in page['items']:
                 if item['track']:
-                    track = item['track']
-                    tracks.append({
-                        'id': track['id'],
-                        'name': track['name'],
-                        'artists': [artist['name'] for artist in track['artists']],
-                        'album': track['album']['name'],
-                        'duration_ms': track['duration_ms'],
-                        'preview_url': track['preview_url'],
-                        'external_urls': track['external_urls']
-                    })
-            
-            return tracks
-        except Exception as e:
-            logger.error(f"Failed to get playlist tracks: {e}")
-            if "token" in str(e).lower() or "auth" in str(e).lower():
-                self.sp = None
-                if self.token_file.exists():
-                    self.token_file.unlink()
-                raise Exception("Spotify authentication expired. Please authenticate again.")
-            raise Exception(f"Failed to get playlist tracks: {str(e)}")
+                    yield _to_track(item['track'])
+    
+    def _playlist_track_ids(self, playlist_id: str) -> Set[str]:
+        """Ids of the tracks already in a playlist"""
+        fetch_page = partial(
+            self.sp.playlist_tracks,
+            playlist_id,
+            fields=_PLAYLIST_TRACK_ID_FIELDS,
+            additional_types=('track',)
+        )
+        return {item['track']['id'] for item in self._fetch_all_items(fetch_page, 100) if item['track']}
+    
+    def get_playlist_tracks_arrays(self, playlist_id: str) -> "PlaylistFrame":
+        """Get tracks from a Spotify playlist as columns for bulk analysis"""
+        from .playlist_frame import PlaylistFrame
+        return PlaylistFrame.from_tracks(self.get_playlist_tracks(playlist_id))
     
     def logout(self) -> bool:
         """Logout and clear authentication"""
         try:
-            self.sp = None
-            if self.token_file.exists():
-                self.token_file.unlink()
+            had_token = self._token_cache.get_cached_token() is not None
+            self._drop_token()
+            if had_token:
                 logger.info("Spotify token cleared successfully")
             return True
         except Exception as e:
-            logger.error(f"Failed to logout: {e}")
+            logger.error("Failed to logout: %s", e)
             return False
+    
+    def close(self):
+        """Stop the token refresher, release pooled connections and finish writing the token file"""
+        self._closing.set()
+        self._token_changed.set()
+        self.sp = None
+        self._session.close()
+        self._token_cache.flush()
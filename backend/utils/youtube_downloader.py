@@ -1,22 +1,50 @@
 import yt_dlp
 import os
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import logging
 from mutagen.mp3 import MP3
 from mutagen.flac import FLAC
 import asyncio
-from config import MEDIA_DIR
+import threading
+from config import MEDIA_DIR, ensure_dir, ensure_media_dirs
+from utils.audio_tags import read_audio_info
 
 logger = logging.getLogger(__name__)
 
+def _list_paths(directory: Path, suffix: str) -> List[str]:
+    """Paths of the files in a directory ending in suffix, like glob('*' + suffix)"""
+    try:
+        with os.scandir(directory) as it:
+            return [
+                entry.path for entry in it
+                if entry.name.endswith(suffix) and not entry.name.startswith('.')
+                and entry.is_file()
+            ]
+    except FileNotFoundError:
+        return []
+
 class YouTubeDownloader:
     def __init__(self, download_dir: str = None):
         if download_dir:
             self.download_dir = Path(download_dir)
         else:
             self.download_dir = MEDIA_DIR
-        self.download_dir.mkdir(exist_ok=True)
+            ensure_media_dirs()
+        ensure_dir(self.download_dir)
+        
+        # YoutubeDL copies its hooks when it is built, so the cached
+        # instances get a single dispatcher and hooks added later still
+        # apply to every download
+        self.progress_hooks: List[Callable[[Dict], None]] = []
+        
+        # Building a YoutubeDL parses the options and sets up extractors
+        # and postprocessors, so instances are reused. They keep per-download
+        # state and aren't safe to share, hence one set per thread. Every
+        # instance is also kept here so close() can release them all
+        self._local = threading.local()
+        self._instances: List[yt_dlp.YoutubeDL] = []
+        self._instances_lock = threading.Lock()
         
         # Quality options
         self.mp3_opts = {
@@ -28,6 +56,7 @@ class YouTubeDownloader:
                 'preferredquality': '320',
             }],
             'writeinfojson': True,
+            'progress_hooks': [self._run_progress_hooks],
         }
         
         self.flac_opts = {
@@ -38,78 +67,112 @@ class YouTubeDownloader:
                 'preferredcodec': 'flac',
             }],
             'writeinfojson': True,
+            'progress_hooks': [self._run_progress_hooks],
         }
         
         self.video_opts = {
             'format': 'best[height<=720]',
             'outtmpl': str(self.download_dir / '%(title)s.%(ext)s'),
             'writeinfojson': True,
+            'progress_hooks': [self._run_progress_hooks],
         }
-    
-    def search_youtube(self, query: str, max_results: int = 5) -> List[Dict]:
-        """Search for videos on YouTube"""
-        search_opts = {
+        
+        # Search results are listed from the results page alone; without
+        # extract_flat every hit is resolved with its own watch-page and
+        # formats requests
+        self.search_opts = {
             'quiet': True,
             'no_warnings': True,
+            'extract_flat': 'in_playlist',
+            'skip_download': True,
         }
-        
+    
+    def _run_progress_hooks(self, status: Dict):
+        for hook in self.progress_hooks:
+            hook(status)
+    
+    def _ydl(self, kind: str, output_dir: Optional[Path] = None) -> yt_dlp.YoutubeDL:
+        """This thread's YoutubeDL for the mp3/flac/video/search options, writing into output_dir"""
+        ydl = getattr(self._local, kind, None)
+        if ydl is None:
+            opts = getattr(self, f"{kind}_opts")
+            ydl = yt_dlp.YoutubeDL(opts)
+            setattr(self._local, kind, ydl)
+            with self._instances_lock:
+                self._instances.append(ydl)
+        if kind != 'search':
+            ydl.params['outtmpl']['default'] = str((output_dir or self.download_dir) / '%(title)s.%(ext)s')
+        return ydl
+    
+    def close(self):
+        """Close every YoutubeDL built so far, releasing their connections and saving cookies"""
+        with self._instances_lock:
+            instances, self._instances = self._instances, []
+            # Threads that keep using the downloader build fresh instances
+            self._local = threading.local()
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception as e:
+                logger.warning("Failed to close YoutubeDL instance: %s", e)
+    
+    def search_youtube(self, query: str, max_results: int = 5) -> List[Dict]:
+        """Search for videos on YouTube"""
         try:
-            with yt_dlp.YoutubeDL(search_opts) as ydl:
-                search_results = ydl.extract_info(
-                    f"ytsearch{max_results}:{query}",
-                    download=False
-                )
-                
-                videos = []
-                for entry in search_results.get('entries', []):
-                    videos.append({
-                        'id': entry.get('id'),
-                        'title': entry.get('title'),
-                        'uploader': entry.get('uploader'),
-                        'duration': entry.get('duration'),
-                        'view_count': entry.get('view_count'),
-                        'url': entry.get('webpage_url'),
-                        'thumbnail': entry.get('thumbnail')
-                    })
-                
-                return videos
+            search_results = self._ydl('search').extract_info(
+                f"ytsearch{max_results}:{query}",
+                download=False
+            )
+            
+            videos = []
+            for entry in search_results.get('entries', []):
+                videos.append({
+                    'id': entry.get('id'),
+                    'title': entry.get('title'),
+                    'uploader': entry.get('uploader'),
+                    'duration': entry.get('duration'),
+                    'view_count': entry.get('view_count'),
+                    # Flat entries carry url and a thumbnails list (best last)
+                    'url': entry.get('webpage_url') or entry.get('url'),
+                    'thumbnail': entry.get('thumbnail') or (entry.get('thumbnails') or [{}])[-1].get('url')
+                })
+            
+            return videos
         except Exception as e:
-            logger.error(f"YouTube search failed: {e}")
+            logger.error("YouTube search failed: %s", e)
             return []
     
     def download_audio(self, url: str, format_type: str = "mp3", playlist_folder: str = None) -> Dict:
         """Download audio from YouTube URL"""
         try:
-            opts = self.mp3_opts if format_type == "mp3" else self.flac_opts
+            kind = "mp3" if format_type == "mp3" else "flac"
             
             # Set output directory based on playlist
+            output_dir = None
             if playlist_folder:
                 output_dir = self.download_dir / playlist_folder / format_type
-                output_dir.mkdir(parents=True, exist_ok=True)
-                opts = opts.copy()
-                opts['outtmpl'] = str(output_dir / '%(title)s.%(ext)s')
-            
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                
-                # Find the downloaded file
-                title = info.get('title', 'Unknown')
-                expected_file = self.download_dir / f"{title}.{format_type}"
-                
-                if playlist_folder:
-                    expected_file = self.download_dir / playlist_folder / format_type / f"{title}.{format_type}"
-                
-                return {
-                    'success': True,
-                    'title': title,
-                    'file_path': str(expected_file),
-                    'duration': info.get('duration'),
-                    'uploader': info.get('uploader'),
-                    'youtube_id': info.get('id')
-                }
-                
+                ensure_dir(output_dir)
+            
+            info = self._ydl(kind, output_dir).extract_info(url, download=True)
+            
+            # Find the downloaded file
+            title = info.get('title', 'Unknown')
+            expected_file = self.download_dir / f"{title}.{format_type}"
+            
+            if playlist_folder:
+                expected_file = self.download_dir / playlist_folder / format_type / f"{title}.{format_type}"
+            
+            return {
+                'success': True,
+                'title': title,
+                'file_path': str(expected_file),
+                'duration': info.get('duration'),
+                'uploader': info.get('uploader'),
+                'youtube_id': info.get('id')
+            }
+            
         except Exception as e:
-            logger.error(f"Download failed: {e}")
+            logger.error("Download failed: %s", e)
             return {
                 'success': False,
                 'error': str(e)
@@ -118,35 +181,32 @@ class YouTubeDownloader:
     def download_video(self, url: str, playlist_folder: str = None) -> Dict:
         """Download video from YouTube URL"""
         try:
-            opts = self.video_opts.copy()
-            
             # Set output directory based on playlist
+            output_dir = None
             if playlist_folder:
                 output_dir = self.download_dir / playlist_folder / "video"
-                output_dir.mkdir(parents=True, exist_ok=True)
-                opts['outtmpl'] = str(output_dir / '%(title)s.%(ext)s')
-            
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                
-                title = info.get('title', 'Unknown')
-                # Video files can have various extensions
-                expected_file = self.download_dir / f"{title}.mp4"
-                
-                if playlist_folder:
-                    expected_file = self.download_dir / playlist_folder / "video" / f"{title}.mp4"
-                
-                return {
-                    'success': True,
-                    'title': title,
-                    'file_path': str(expected_file),
-                    'duration': info.get('duration'),
-                    'uploader': info.get('uploader'),
-                    'youtube_id': info.get('id')
-                }
-                
+                ensure_dir(output_dir)
+            
+            info = self._ydl("video", output_dir).extract_info(url, download=True)
+            
+            title = info.get('title', 'Unknown')
+            # Video files can have various extensions
+            expected_file = self.download_dir / f"{title}.mp4"
+            
+            if playlist_folder:
+                expected_file = self.download_dir / playlist_folder / "video" / f"{title}.mp4"
+            
+            return {
+                'success': True,
+                'title': title,
+                'file_path': str(expected_file),
+                'duration': info.get('duration'),
+                'uploader': info.get('uploader'),
+                'youtube_id': info.get('id')
+            }
+            
         except Exception as e:
-            logger.error(f"Video download failed: {e}")
+            logger.error("Video download failed: %s", e)
             return {
                 'success': False,
                 'error': str(e)
@@ -157,6 +217,10 @@ class YouTubeDownloader:
         try:
             file_path = Path(file_path)
             
+            info = read_audio_info(file_path)
+            if info is not None:
+                return info
+            
             if file_path.suffix.lower() == '.mp3':
                 audio = MP3(file_path)
                 return {
@@ -178,7 +242,7 @@ class YouTubeDownloader:
                     'format': 'FLAC'
                 }
         except Exception as e:
-            logger.error(f"Failed to extract metadata: {e}")
+            logger.error("Failed to extract metadata: %s", e)
             
         return {}
     
@@ -187,25 +251,22 @@ class YouTubeDownloader:
         try:
             base_dir = self.download_dir / playlist_folder
             
-            mp3_dir = base_dir / "mp3"
-            flac_dir = base_dir / "flac"
-            video_dir = base_dir / "video"
-            
-            # Count files in each directory
-            mp3_files = list(mp3_dir.glob("*.mp3")) if mp3_dir.exists() else []
-            flac_files = list(flac_dir.glob("*.flac")) if flac_dir.exists() else []
-            video_files = list(video_dir.glob("*.mp4")) if video_dir.exists() else []
+            # One directory read per format; entry.path strings are kept
+            # as-is instead of being wrapped in Path objects
+            mp3_files = _list_paths(base_dir / "mp3", ".mp3")
+            flac_files = _list_paths(base_dir / "flac", ".flac")
+            video_files = _list_paths(base_dir / "video", ".mp4")
             
             return {
                 'mp3_count': len(mp3_files),
                 'flac_count': len(flac_files),
                 'video_count': len(video_files),
-                'mp3_files': [str(f) for f in mp3_files],
-                'flac_files': [str(f) for f in flac_files],
-                'video_files': [str(f) for f in video_files],
+                'mp3_files': mp3_files,
+                'flac_files': flac_files,
+                'video_files': video_files,
                 'is_balanced': len(mp3_files) == len(flac_files) == len(video_files)
             }
             
         except Exception as e:
-            logger.error(f"Failed to organize files: {e}")
+            logger.error("Failed to organize files: %s", e)
             return {}
\ No newline at end of file
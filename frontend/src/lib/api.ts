@@ -168,6 +168,20 @@ class APIClient {
     return response.data;
   }
 
+  async downloadYouTubeBatch(urls: string[], formatType: string = 'mp3', playlistId?: number) {
+    const response = await axios.post(`${this.baseURL}/youtube/download_batch`, {
+      urls,
+      format_type: formatType,
+      playlist_id: playlistId
+    });
+    return response.data;
+  }
+
+  async getDownloadJob(jobId: number) {
+    const response = await axios.get(`${this.baseURL}/youtube/jobs/${jobId}`);
+    return response.data;
+  }
+
   // Spotify Search
   async searchSpotify(query: string, artist?: string) {
     const response = await axios.get(`${this.baseURL}/spotify/search`, {
@@ -176,8 +190,15 @@ class APIClient {
     return response.data;
   }
 
-  async getSpotifyPlaylists() {
-    const response = await axios.get(`${this.baseURL}/spotify/playlists`);
+  async searchSpotifyBulk(queries: { q: string; artist?: string }[]) {
+    const response = await axios.post(`${this.baseURL}/spotify/search_bulk`, { queries });
+    return response.data;
+  }
+
+  async getSpotifyPlaylists(detailed: boolean = false) {
+    const response = await axios.get(`${this.baseURL}/spotify/playlists`, {
+      params: detailed ? { detailed } : undefined
+    });
     return response.data;
   }
 
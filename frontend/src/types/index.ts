@@ -45,7 +45,12 @@ export interface SpotifyTrack {
 export interface DownloadJob {
   job_id: number;
   status: 'pending' | 'downloading' | 'completed' | 'failed';
-  result: any;
+  url?: string;
+  progress?: number;
+  error?: string | null;
+  song_id?: number | null;
+  created_at?: string;
+  completed_at?: string | null;
 }
 
 export interface FileOrganization {